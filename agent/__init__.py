@@ -1,7 +1,9 @@
 from .randomAgent import randomModel
 # from .debugAgent import debugModel
 # from .dqn_agent import dqnModel
-# from .allfoldAgent import allFoldModel
-# from .allcallAgent import allCallModel
-# from .allinAgent import allinModel
-# from .allraiseAgent import allRaiseModel
+from .allfoldAgent import allFoldModel
+from .allcallAgent import allCallModel
+from .allinAgent import allinModel
+from .allraiseAgent import allRaiseModel
+from .cfrAgent import cfrModel
+from .lookupAgent import lookupModel
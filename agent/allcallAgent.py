@@ -21,12 +21,11 @@ class allCallModel():
     def loadModel(self, path):
         return
 
-    def takeAction(self, state, playerid):
+    def takeAction(self, state, playerid, valid_actions):
         ''' (Predict/ Policy) Select Action under state'''
-        if state.community_state.to_call == 0:
-            return ACTION(action_table.CHECK, 0)
-        else:
-            return ACTION(action_table.CALL, state.community_state.to_call)
+        if valid_actions['call']:
+            return ACTION(action_table.CALL, valid_actions['call_amount'])
+        return ACTION(action_table.CHECK, 0)
 
     def getReload(self, state):
         '''return `True` if reload is needed under state, otherwise `False`'''
@@ -21,9 +21,14 @@ class allinModel():
     def loadModel(self, path):
         return
 
-    def takeAction(self, state, playerid):
+    def takeAction(self, state, playerid, valid_actions):
         ''' (Predict/ Policy) Select Action under state'''
-        return ACTION(action_table.RAISE, state.player_states[playerid].stack)
+        if valid_actions['raise']:
+            # the largest raise: the stack, capped by the largest stack of the other players still able to bet
+            return ACTION(action_table.RAISE, valid_actions['raise_range'][1])
+        if valid_actions['call']:
+            return ACTION(action_table.CALL, valid_actions['call_amount'])
+        return ACTION(action_table.CHECK, 0)
 
     def getReload(self, state):
         '''return `True` if reload is needed under state, otherwise `False`'''
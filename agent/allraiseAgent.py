@@ -21,9 +21,14 @@ class allRaiseModel():
     def loadModel(self, path):
         return
 
-    def takeAction(self, state, playerid):
+    def takeAction(self, state, playerid, valid_actions):
         ''' (Predict/ Policy) Select Action under state'''
-        return ACTION(action_table.RAISE, state.community_state.to_call * 2)
+        if valid_actions['raise']:
+            minraise, maxraise = valid_actions['raise_range']
+            return ACTION(action_table.RAISE, min(max(state.community_state.to_call * 2, minraise), maxraise))
+        if valid_actions['call']:
+            return ACTION(action_table.CALL, valid_actions['call_amount'])
+        return ACTION(action_table.CHECK, 0)
 
     def getReload(self, state):
         '''return `True` if reload is needed under state, otherwise `False`'''
@@ -0,0 +1,76 @@
+import numpy as np
+from gym import error
+
+from holdem.broker import table_state_from_observation
+from holdem.cfr import BettingHistory, CFRPolicy, HandBuckets, decision_mask
+from holdem.infoset import infoset_key
+
+
+class cfrModel():
+    """
+    Plays the average strategy saved by `holdem.cfr.CFRSolver.save`, uniformly random over the legal abstract
+    actions in the information sets the solver never reached.
+    The agent follows the betting through the env events: `attach(env)` it to the table before playing.
+    Actions are sampled with the global `np.random` generator, unless a `seed` is given.
+    """
+
+    def __init__(self, path, seed=None):
+        self.policy = CFRPolicy.load(path)
+        self.abstraction = self.policy.abstraction
+        self.buckets = HandBuckets(self.policy.config['n_buckets'])
+        self.max_raises = self.policy.config['max_raises']
+        self.history = BettingHistory(self.abstraction)
+        self.observe = self.history
+        self.seed(seed)
+        self.reload_left = 2
+        self._mask = np.zeros(self.abstraction.n_actions, dtype=bool)
+
+    def seed(self, seed=None):
+        """ sample with a generator seeded with `seed`, with the global `np.random` when None """
+        self.rng = np.random.default_rng(seed) if seed is not None else np.random
+
+    def attach(self, env):
+        """ listen to the events of `env` """
+        if self.observe not in env._listeners:
+            env.add_listener(self.observe)
+        return self
+
+    def batchTrainModel(self):
+        return
+
+    def onlineTrainModel(self):
+        return
+
+    def saveModel(self, path):
+        self.policy.save(path)
+
+    def loadModel(self, path):
+        self.__init__(path)
+
+    def takeAction(self, state, playerid, valid_actions):
+        """ sample an abstract action of the policy, as a concrete ACTION """
+        history = self.history
+        if history.button < 0:
+            raise error.Error('cfrModel is not attached to the env, see cfrModel.attach')
+        table_state = table_state_from_observation(state, playerid, valid_actions)
+        mask = decision_mask(self.abstraction, table_state, valid_actions, history.raises, self.max_raises,
+                             self._mask)
+        hand = list(state.player_states[playerid].hand)
+        board = [c for c in state.community_card if c != -1]
+        key = infoset_key(history.position(playerid), history.round, self.buckets.bucket(hand, board),
+                          history.key)
+        probabilities = self.policy.probabilities(key)
+        if probabilities is not None:
+            probabilities = np.where(mask, probabilities, 0.0)
+        if probabilities is None or probabilities.sum() <= 0:
+            probabilities = mask.astype(float)
+        index = self.rng.choice(len(probabilities), p=probabilities / probabilities.sum())
+        return self.abstraction.to_action(index, table_state)
+
+    def getReload(self, state):
+        """return `True` if reload is needed under state, otherwise `False`"""
+        if self.reload_left > 0:
+            self.reload_left -= 1
+            return True
+        else:
+            return False
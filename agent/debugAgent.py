@@ -1,62 +1,19 @@
 from collections import namedtuple
 from enum import Enum
-from holdem import PLAYER_STATE, COMMUNITY_STATE, STATE, ACTION, action_table, card_to_normal_str
+from holdem import PLAYER_STATE, COMMUNITY_STATE, STATE, ACTION, action_table, ObservationEncoder
 import random
 
-CHAR_SUIT_TO_INT = {
-        's': 0,  # spades
-        'h': 13,  # hearts
-        'd': 26,  # diamonds
-        'c': 39,  # clubs
-}
-# " {'23456789TJQKA'} + {'shdc''} (note: lower case) "
-CHAR_NUM_TO_INT = {
-        '2': 1,
-        '3': 2,
-        '4': 3,
-        '5': 4,
-        '6': 5,
-        '7': 6,
-        '8': 7,
-        '9': 8,
-        'T': 9,
-        'J': 10,
-        'Q': 11,
-        'K': 12,
-        'A': 0,
-}
-
 class debugModel():
     def __init__(self):
         self._nothing = "test"
         self.reload_left = 2
         self.model = {"seed":831}
-        self._state = [0] * 52 * 2 + [0] * 52 * 5 + [0] *3 # { my 2 card (one hot), community 5 card (one hot), total_pot, my_stack, to_call) ]
-
-    def __turn_card_to_one_hot(self, card):
-        if card == -1:
-            return [0] * 52
-        # " {'23456789TJQKA'} + {'shdc''} (note: lower case) "
-        card_info = card_to_normal_str(card)
-        card_idx = CHAR_NUM_TO_INT[card_info[:1]] + CHAR_SUIT_TO_INT[card_info[1:]]
-        card_hot = [0]*52
-        card_hot[card_idx] = 1
-        return card_hot
+        # 367 features: { my 2 card (one hot), community 5 card (one hot), total_pot, my_stack, to_call) }
+        self._encoder = ObservationEncoder(cards='one_hot')
 
     def __turn_observation_to_state(self, observation, playerid):
-        my_card = observation.player_states[playerid].hand
-        community_card = observation.community_card
-        my_stack = observation.player_states[playerid].stack
-        total_pot = observation.community_state.totalpot
-        to_call = observation.community_state.to_call
-        return self.__turn_card_to_one_hot(my_card[0]) + \
-               self.__turn_card_to_one_hot(my_card[1])+ \
-               self.__turn_card_to_one_hot(community_card[0])+ \
-               self.__turn_card_to_one_hot(community_card[1])+ \
-               self.__turn_card_to_one_hot(community_card[2])+ \
-               self.__turn_card_to_one_hot(community_card[3])+ \
-               self.__turn_card_to_one_hot(community_card[4])+ \
-               [total_pot, my_stack, to_call]
+        # the encoder buffer is reused by the next call
+        return self._encoder.encode(observation, playerid)
 
     def batchTrainModel(self):
         return
@@ -1,6 +1,6 @@
 from collections import namedtuple
 from enum import Enum
-from holdem import PLAYER_STATE, COMMUNITY_STATE, STATE, ACTION, action_table, card_to_normal_str
+from holdem import PLAYER_STATE, COMMUNITY_STATE, STATE, ACTION, action_table, ObservationEncoder
 import random
 
 from treys import Evaluator
@@ -11,37 +11,16 @@ import numpy as np
 # from keras import backend as K
 # from keras.losses import binary_crossentropy
 
-CHAR_SUIT_TO_INT = {
-        's': 0,  # spades
-        'h': 13,  # hearts
-        'd': 26,  # diamonds
-        'c': 39,  # clubs
-}
-# " {'23456789TJQKA'} + {'shdc''} (note: lower case) "
-CHAR_NUM_TO_INT = {
-        '2': 1,
-        '3': 2,
-        '4': 3,
-        '5': 4,
-        '6': 5,
-        '7': 6,
-        '8': 7,
-        '9': 8,
-        'T': 9,
-        'J': 10,
-        'Q': 11,
-        'K': 12,
-        'A': 0,
-}
-
 class dqnModel():
     def __init__(self):
         self._nothing = "test"
         self.reload_left = 2
         self.model = {"seed":831}
 
-        # total 367 states
-        self._state = [0] * 52 * 2 + [0] * 52 * 5 + [0] *3 # { my 2 card (one hot), community 5 card (one hot), total_pot, my_stack, to_call) ]
+        # 367 features: { my 2 card (one hot), community 5 card (one hot), total_pot, my_stack, to_call) }
+        self._encoder = ObservationEncoder(cards='one_hot')
+        # 55 features: { my 2 card and community cards (one 52 bitmask), total_pot, my_stack, to_call) }
+        self._encoder_52 = ObservationEncoder(cards='combined')
         # add new initial
         self.action_size = 4
         self.learning_rate = 0.001
@@ -73,67 +52,12 @@ class dqnModel():
     #     model.summary()
     #     return model
 
-    def __turn_card_to_one_hot(self, card):
-        if card == -1:
-            return [0] * 52
-        # " {'23456789TJQKA'} + {'shdc''} (note: lower case) "
-        card_info = card_to_normal_str(card)
-        
-        # for j in ['s','h','d','c']:
-        #     for i in ['A','2','3','4','5','6','7','8','9','T','J','Q','K']:
-        #         card_hot = [0]*52
-        #         print('{0}'.format(i+j))
-        #         card_idx = CHAR_NUM_TO_INT[i] + CHAR_SUIT_TO_INT[j]
-        #         print(card_idx)
-        #         card_hot[card_idx] = 1
-        #         print(card_hot)
-        #         input('pause')
-
-        card_idx = CHAR_NUM_TO_INT[card_info[:1]] + CHAR_SUIT_TO_INT[card_info[1:]]
-        card_hot = [0]*52
-        card_hot[card_idx] = 1
-        return card_hot
-
     def __turn_observation_to_state(self, observation, playerid):
-        my_card = observation.player_states[playerid].hand
-        community_card = observation.community_card
-        my_stack = observation.player_states[playerid].stack
-        total_pot = observation.community_state.totalpot
-        to_call = observation.community_state.to_call
-        return self.__turn_card_to_one_hot(my_card[0]) + \
-               self.__turn_card_to_one_hot(my_card[1])+ \
-               self.__turn_card_to_one_hot(community_card[0])+ \
-               self.__turn_card_to_one_hot(community_card[1])+ \
-               self.__turn_card_to_one_hot(community_card[2])+ \
-               self.__turn_card_to_one_hot(community_card[3])+ \
-               self.__turn_card_to_one_hot(community_card[4])+ \
-               [total_pot, my_stack, to_call]
+        # the encoder buffers are reused by the next call
+        return self._encoder.encode(observation, playerid)
 
     def __turn_observation_to_stateJust52(self, observation, playerid):
-        card_hot = [0]*52
-        my_card = observation.player_states[playerid].hand
-        for i in my_card:
-            card_hot = self.__turn_card_to_one_hot_returnIndx(i, card_hot)
-        community_card = observation.community_card
-        for i in community_card:
-            card_hot = self.__turn_card_to_one_hot_returnIndx(i, card_hot)
-        my_stack = observation.player_states[playerid].stack
-        total_pot = observation.community_state.totalpot
-        to_call = observation.community_state.to_call
-        return card_hot + [total_pot, my_stack, to_call]
-
-
-    def __turn_card_to_one_hot_returnIndx(self, card, card_hot):
-        if card == -1:
-            return card_hot
-        else:
-            card_info = card_to_normal_str(card)
-            card_idx = CHAR_NUM_TO_INT[card_info[:1]] + CHAR_SUIT_TO_INT[card_info[1:]]
-            if card_hot[card_idx] == 1:
-                input("Error!!!!!! card_hot cann't duplicate")
-            else:
-                card_hot[card_idx] = 1
-            return card_hot
+        return self._encoder_52.encode(observation, playerid)
 
     def batchTrainModel(self):
         return
@@ -177,7 +101,7 @@ class dqnModel():
             return False
 
     def sameSuit(self, _stateCards):
-        x = np.array(_stateCards[:53])
+        x = np.asarray(_stateCards[:52])
         print(x)
         print(np.where(x == 1))
         
@@ -0,0 +1,129 @@
+import random
+
+from gym import error
+
+from holdem import ACTION, action_table
+from holdem.abstraction import ActionAbstraction, abstract_action
+from holdem.cfr import BettingHistory, HandBuckets
+from holdem.deck import FULL_DECK
+from holdem.equity import COMBO_INDEX
+from holdem.infoset import StrategyStore, infoset_key
+
+
+class lookupModel():
+    """
+    Plays a strategy table written by `holdem.cfr.CFRPolicy.to_store`: the StrategyStore file is memory mapped read
+    only, so the worker processes of a tournament share its pages through the page cache. A decision is the key of
+    the information set, one lookup in the file and a sample of the mixed strategy over the legal abstract actions
+    (uniform in the information sets missing from the table, counted in `unknown`).
+    The card buckets of a board are computed when it is dealt: `attach(env)` the agent to the table before playing.
+    Actions are sampled with the global `random` generator, unless a `seed` is given.
+    """
+
+    def __init__(self, path, seed=None):
+        self.store = StrategyStore(path, capacity=0, mode='r')
+        config = self.store.meta
+        if 'n_buckets' not in config:
+            raise error.Error('{} has no solver config ({}.json), see CFRPolicy.to_store'.format(path, path))
+        self.abstraction = ActionAbstraction(config['raise_fractions'])
+        self.buckets = HandBuckets(config['n_buckets'])
+        self.max_raises = config['max_raises']
+        self.history = BettingHistory(self.abstraction)
+        # combo index of two treys cards, buckets of the combos on the current board
+        cards = FULL_DECK.tolist()
+        self._combo = {a: dict(zip(cards, row)) for a, row in zip(cards, COMBO_INDEX.tolist())}
+        self._buckets = self.buckets.buckets([])
+        self.seed(seed)
+        self.decisions = 0
+        self.unknown = 0
+        self.reload_left = 2
+
+    def seed(self, seed=None):
+        """ sample with a generator seeded with `seed`, with the global `random` when None """
+        self.random = random.Random(seed) if seed is not None else random
+
+    def observe(self, event, info):
+        """ env listener: follow the betting, compute the buckets of a new board """
+        history = self.history
+        round = history.round
+        history(event, info)
+        if event == 'cycle_start' or (event == 'board' and history.round != round):
+            self._buckets = self.buckets.buckets(history.board)
+
+    def attach(self, env):
+        """ listen to the events of `env` """
+        if self.observe not in env._listeners:
+            env.add_listener(self.observe)
+        return self
+
+    def batchTrainModel(self):
+        return
+
+    def onlineTrainModel(self):
+        return
+
+    def saveModel(self, path):
+        return
+
+    def loadModel(self, path):
+        self.__init__(path)
+
+    def takeAction(self, state, playerid, valid_actions):
+        """ sample an abstract action of the strategy table, as a concrete ACTION """
+        history = self.history
+        if history.button < 0:
+            raise error.Error('lookupModel is not attached to the env, see lookupModel.attach')
+        community = state.community_state
+        hand = state.player_states[playerid].hand
+        key = infoset_key(history.position(playerid), history.round, self._buckets[self._combo[hand[0]][hand[1]]],
+                          history.key)
+        row = self.store.peek(key)
+        self.decisions += 1
+        index = amount = None
+        if row is not None:
+            # sample the whole row and only check the legality of the sampled action: when it is illegal, sampling
+            # again over the legal actions keeps the probabilities of the legal ones at row[i] / sum of legal rows
+            r = self.random.random()
+            for index, weight in enumerate(row):
+                r -= weight
+                if r < 0:
+                    amount = self.abstraction.legal_amount(index, valid_actions, community.to_call,
+                                                           community.totalpot, history.raises < self.max_raises)
+                    break
+        if amount is None:
+            index, amount = self._sample_legal(row, valid_actions, community, history)
+        if index >= abstract_action.RAISE:
+            return ACTION(action_table.RAISE, amount)
+        if index == abstract_action.CHECK_CALL:
+            return ACTION(action_table.CALL, amount) if amount else ACTION(action_table.CHECK, 0)
+        return ACTION(action_table.FOLD, 0)
+
+    def _sample_legal(self, row, valid_actions, community, history):
+        """ abstract action and chips sampled over the legal actions, uniformly when they have no weight in `row` """
+        legal, amounts = self.abstraction.legal_amounts(valid_actions, community.to_call, community.totalpot,
+                                                        history.raises < self.max_raises)
+        total = 0.0
+        if row is not None:
+            for index in legal:
+                total += row[index]
+        if total > 0:
+            r = self.random.random() * total
+            for choice, index in enumerate(legal):
+                if r < row[index]:
+                    break
+                r -= row[index]
+            else:
+                # rounding left r above the last weight
+                choice = max(range(len(legal)), key=lambda j: row[legal[j]])
+        else:
+            self.unknown += 1
+            choice = int(self.random.random() * len(legal))
+        return legal[choice], amounts[choice]
+
+    def getReload(self, state):
+        """return `True` if reload is needed under state, otherwise `False`"""
+        if self.reload_left > 0:
+            self.reload_left -= 1
+            return True
+        else:
+            return False
@@ -0,0 +1,125 @@
+"""
+Run every benchmark and write the results as JSON, to compare releases.
+
+    python -m benchmark --json results.json
+    python -m benchmark --quick --suites env episodes
+
+The exit status is 1 when a result has a threshold (`max_us`) that is not met.
+"""
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+
+import numpy as np
+
+from holdem.evaluator import get_numpy_evaluator
+
+from .bench_encoder import bench_encoder
+from .bench_env import bench_steps
+from .bench_episodes import AGENT_PAIRS, bench_episodes
+from .bench_lookup import bench_lookup
+from .bench_evaluator import bench_evaluator
+from .bench_snapshot import bench_snapshot
+from .bench_store import bench_store
+from .bench_tables import bench_tables
+
+SUITES = ('env', 'evaluator', 'encoder', 'episodes', 'snapshot', 'tables', 'store', 'lookup')
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(suites=SUITES, quick=False, seed=0, repeat=3, max_us=10.0):
+    """ list of {'suite', 'name', 'params', 'metrics'} """
+    scale = 0.1 if quick else 1.0
+    results = []
+
+    def add(suite, name, params, metrics):
+        results.append({'suite': suite, 'name': name, 'params': params, 'metrics': metrics})
+        print('{:<10} {:<45} {}'.format(suite, name, ', '.join(
+            '{}={:,.0f}'.format(k, v) for k, v in metrics.items() if k.endswith('_per_s'))), file=sys.stderr)
+        if 'met' in metrics:
+            print('{:<10} {:<45} median {:.2f} us, threshold {} us {}'.format(
+                '', '', metrics['p50_us'], metrics['max_us'], 'met' if metrics['met'] else 'NOT MET'), file=sys.stderr)
+
+    get_numpy_evaluator()
+    if 'env' in suites:
+        for env_id, n_seats in (('TexasHoldem-v0', 2), ('TexasHoldem-v1', 4), ('TexasHoldem-v2', 10)):
+            for obs_mode in ('tuple', 'array'):
+                params = {'n_seats': n_seats, 'obs_mode': obs_mode, 'n_steps': int(50000 * scale), 'seed': seed}
+                metrics = max((bench_steps(**params) for _ in range(repeat)), key=lambda r: r['steps_per_s'])
+                add('env', '{} {}'.format(env_id, obs_mode), params, metrics)
+    if 'evaluator' in suites:
+        params = {'n_hands': int(2000000 * scale), 'n_treys': int(100000 * scale), 'batch': 100000, 'seed': seed}
+        add('evaluator', 'treys vs NumpyEvaluator', params, bench_evaluator(**params))
+    if 'encoder' in suites:
+        for cards in ('one_hot', 'bitmask'):
+            params = {'n_states': int(20000 * scale), 'cards': cards, 'batch': 1024, 'seed': seed}
+            add('encoder', 'ObservationEncoder {}'.format(cards), params, bench_encoder(**params))
+    if 'episodes' in suites:
+        for spec_a, spec_b in AGENT_PAIRS:
+            params = {'spec_a': spec_a, 'spec_b': spec_b, 'n_episodes': int(200 * scale), 'seed': seed}
+            add('episodes', '{} vs {}'.format(spec_a, spec_b), params, bench_episodes(**params))
+    if 'snapshot' in suites:
+        for n_seats in (2, 4, 10):
+            params = {'n_seats': n_seats, 'n_states': int(5000 * scale), 'seed': seed}
+            add('snapshot', '{} seats'.format(n_seats), params, bench_snapshot(**params))
+    if 'tables' in suites:
+        for n_seats in (2, 10):
+            for obs_mode in ('tuple', 'array'):
+                params = {'n_seats': n_seats, 'n_tables': int(2000 * scale), 'obs_mode': obs_mode}
+                add('tables', '{} seats {}'.format(n_seats, obs_mode), params, bench_tables(**params))
+    if 'store' in suites:
+        params = {'n_keys': int(200000 * scale), 'capacity': int(20000 * scale), 'n_lookups': int(100000 * scale),
+                  'seed': seed}
+        add('store', 'StrategyStore', params, bench_store(**params))
+    if 'lookup' in suites:
+        params = {'iterations': int(200 * scale), 'n_decisions': int(20000 * scale), 'seed': seed, 'max_us': max_us}
+        add('lookup', 'lookupModel', params, bench_lookup(**params))
+    return results
+
+
+def parse():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--suites', nargs='+', default=list(SUITES), choices=SUITES)
+    parser.add_argument('--quick', action='store_true', help='10x smaller runs')
+    parser.add_argument('--repeat', type=int, default=3, help='env runs per configuration, the best one is kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max_us', type=float, default=10.0, help='lookup suite: median decision time threshold')
+    parser.add_argument('--json', type=str, default=None, help='write the results to this file (default: stdout)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse()
+    report = {
+        'meta': {
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'quick': args.quick,
+        },
+        'results': run(args.suites, args.quick, args.seed, args.repeat, args.max_us),
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if not all(result['metrics'].get('met', True) for result in report['results']):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+ObservationEncoder throughput, one observation at a time and batched.
+
+    python -m benchmark.bench_encoder --n_states 20000
+"""
+import argparse
+import time
+
+from holdem import ObservationEncoder, safe_actions
+
+from .bench_env import make_env, new_episode
+
+
+def collect_states(n_states, n_seats=2, seed=0):
+    """ (states, playerids) seen by the current players of a game played with `safe_actions` """
+    env = make_env(n_seats)
+    env.seed(seed)
+    states, playerids = [], []
+    new_episode(env)
+    while len(states) < n_states:
+        if env.episode_end:
+            new_episode(env)
+        state, terminal = env.reset()
+        while not terminal and len(states) < n_states:
+            states.append(state)
+            playerids.append(env._current_player.player_id)
+            state, _, terminal, _ = env.step(safe_actions(state, n_seats))
+    return states, playerids
+
+
+def bench_encoder(n_states=20000, cards='one_hot', batch=1024, seed=0):
+    """ observations/s of `encode` and of `encode_batch` by batches of `batch` """
+    states, playerids = collect_states(n_states, seed=seed)
+    encoder = ObservationEncoder(cards)
+    t = time.perf_counter()
+    for state, playerid in zip(states, playerids):
+        encoder.encode(state, playerid)
+    single_rate = n_states / (time.perf_counter() - t)
+    t = time.perf_counter()
+    for i in range(0, n_states, batch):
+        encoder.encode_batch(states[i:i + batch], playerids[i:i + batch])
+    batch_rate = n_states / (time.perf_counter() - t)
+    return {'observations': n_states, 'size': encoder.size, 'encode_per_s': single_rate,
+            'encode_batch_per_s': batch_rate}
+
+
+def parse():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n_states', type=int, default=20000)
+    parser.add_argument('--batch', type=int, default=1024)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse()
+    for cards in ('one_hot', 'bitmask'):
+        result = bench_encoder(args.n_states, cards, args.batch, args.seed)
+        print('{:<7} ({} features): encode {:>10,.0f} obs/s, encode_batch {:>10,.0f} obs/s'.format(
+            cards, result['size'], result['encode_per_s'], result['encode_batch_per_s']))
+
+
+if __name__ == '__main__':
+    main()
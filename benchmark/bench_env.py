@@ -0,0 +1,85 @@
+"""
+TexasHoldemEnv reset (new cycle) and step throughput, with a fixed policy (check/call, sometimes a minimum raise).
+
+    python -m benchmark.bench_env --n_steps 50000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from holdem import TexasHoldemEnv, action_table
+from holdem.evaluator import get_numpy_evaluator
+
+
+def make_env(n_seats, obs_mode='tuple', stack=1000):
+    env = TexasHoldemEnv(n_seats, headless=True, evaluator=get_numpy_evaluator(), obs_mode=obs_mode)
+    for seat in range(n_seats):
+        env.add_player(seat, stack=stack)
+    return env
+
+
+def new_episode(env, stack=1000):
+    env.episode_reset()
+    for p in env._seats:
+        p.__init__(p.player_id, stack)
+        p.set_seat(p.player_id)
+
+
+def bench_steps(n_seats, n_steps, obs_mode='tuple', seed=0, raise_prob=0.2):
+    """ play n_steps actions, return {'steps', 'cycles', 'seconds', 'steps_per_s', 'resets_per_s'} """
+    env = make_env(n_seats, obs_mode)
+    env.seed(seed)
+    rng = np.random.default_rng(seed)
+    raises = (rng.random(n_steps) < raise_prob).tolist()
+    steps = cycles = 0
+    reset_seconds = 0.0
+    t = time.perf_counter()
+    new_episode(env)
+    while steps < n_steps:
+        if env.episode_end:
+            new_episode(env)
+        t_reset = time.perf_counter()
+        _, terminal = env.reset()
+        reset_seconds += time.perf_counter() - t_reset
+        cycles += 1
+        if terminal:
+            continue
+        valid_actions = env.get_valid_actions(env._current_player)
+        while not terminal and steps < n_steps:
+            actions = [[action_table.CHECK, action_table.NA]] * n_seats
+            if valid_actions['raise'] and raises[steps]:
+                actions[env._current_player.player_id] = [action_table.RAISE, valid_actions['raise_range'][0]]
+            elif valid_actions['call'] and valid_actions.get('call_amount'):
+                actions[env._current_player.player_id] = [action_table.CALL, valid_actions['call_amount']]
+            _, _, terminal, valid_actions = env.step(actions)
+            steps += 1
+    seconds = time.perf_counter() - t
+    return {'steps': steps, 'cycles': cycles, 'seconds': seconds, 'steps_per_s': steps / seconds,
+            'resets_per_s': cycles / reset_seconds}
+
+
+def parse():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n_steps', type=int, default=50000, help='actions per configuration')
+    parser.add_argument('--seats', type=int, nargs='+', default=[2, 4, 10], help='table sizes (v0, v1, v2)')
+    parser.add_argument('--obs_modes', nargs='+', default=['tuple', 'array'], choices=TexasHoldemEnv.OBS_MODES)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per configuration, the best one is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse()
+    get_numpy_evaluator()
+    for n_seats in args.seats:
+        for obs_mode in args.obs_modes:
+            result = max((bench_steps(n_seats, args.n_steps, obs_mode, args.seed) for _ in range(args.repeat)),
+                         key=lambda r: r['steps_per_s'])
+            print('{:>2} seats, {:<5} observations: {:>10,.0f} steps/s {:>10,.0f} resets/s ({:,} steps, {:,} cycles)'
+                  .format(n_seats, obs_mode, result['steps_per_s'], result['resets_per_s'], result['steps'],
+                          result['cycles']))
+
+
+if __name__ == '__main__':
+    main()
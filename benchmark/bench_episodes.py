@@ -0,0 +1,70 @@
+"""
+Full heads-up episodes (until a player is out) between the bundled agents.
+
+    python -m benchmark.bench_episodes --n_episodes 200
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from holdem.tournament import load_agent, play_episode
+
+from .bench_env import make_env
+
+# allFoldModel against itself never ends an episode
+AGENT_PAIRS = [
+    ('agent.randomModel', 'agent.randomModel'),
+    ('agent.allCallModel', 'agent.randomModel'),
+    ('agent.allRaiseModel', 'agent.allCallModel'),
+    ('agent.allinModel', 'agent.randomModel'),
+    ('agent.allFoldModel', 'agent.allCallModel'),
+]
+
+
+class _counting_agent(object):
+    """ count the decisions of an agent """
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.decisions = 0
+
+    def takeAction(self, state, playerid, valid_actions):
+        self.decisions += 1
+        return self.agent.takeAction(state, playerid, valid_actions)
+
+
+def bench_episodes(spec_a, spec_b, n_episodes=200, seed=0):
+    """ episodes/s and decisions/s of agent a against agent b (agent decisions included) """
+    env = make_env(2)
+    env.seed(seed)
+    random.seed(seed)
+    np.random.seed(seed)
+    models = [_counting_agent(load_agent(spec_a)), _counting_agent(load_agent(spec_b))]
+    t = time.perf_counter()
+    for _ in range(n_episodes):
+        play_episode(env, models)
+    seconds = time.perf_counter() - t
+    decisions = sum(m.decisions for m in models)
+    return {'episodes': n_episodes, 'decisions': decisions, 'seconds': seconds,
+            'episodes_per_s': n_episodes / seconds, 'decisions_per_s': decisions / seconds}
+
+
+def parse():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n_episodes', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse()
+    for spec_a, spec_b in AGENT_PAIRS:
+        result = bench_episodes(spec_a, spec_b, args.n_episodes, args.seed)
+        print('{:>20} vs {:<20}: {:>8,.0f} episodes/s {:>10,.0f} decisions/s'.format(
+            spec_a, spec_b, result['episodes_per_s'], result['decisions_per_s']))
+
+
+if __name__ == '__main__':
+    main()
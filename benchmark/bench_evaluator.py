@@ -0,0 +1,74 @@
+"""
+Hand evaluation throughput: holdem.evaluator.NumpyEvaluator against treys.
+
+    python -m benchmark.bench_evaluator --n_hands 2000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from holdem.evaluator import get_evaluator, get_numpy_evaluator
+from holdem.deck import FULL_DECK
+
+
+def random_hands(rng, n, n_board=5):
+    """ (hands, boards) of n random 2 + n_board card deals, in treys format """
+    cards = FULL_DECK[rng.random((n, 52)).argsort(axis=1)[:, :2 + n_board]]
+    return cards[:, :2], cards[:, 2:]
+
+
+def parse():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n_hands', type=int, default=2000000, help='hands ranked by the NumPy evaluator')
+    parser.add_argument('--n_treys', type=int, default=100000, help='hands ranked by treys (much slower)')
+    parser.add_argument('--batch', type=int, default=100000, help='hands per evaluate_many call')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def bench_evaluator(n_hands=2000000, n_treys=100000, batch=100000, seed=0):
+    """ hands/s of treys, NumpyEvaluator.evaluate and NumpyEvaluator.evaluate_many (ranks are checked) """
+    rng = np.random.default_rng(seed)
+
+    t = time.perf_counter()
+    treys_evaluator = get_evaluator()
+    numpy_evaluator = get_numpy_evaluator()
+    build_seconds = time.perf_counter() - t
+
+    batches = [random_hands(rng, batch) for _ in range(max(1, n_hands // batch))]
+    n = sum(len(h) for h, _ in batches)
+    t = time.perf_counter()
+    for hands, boards in batches:
+        numpy_evaluator.evaluate_many(hands, boards)
+    numpy_rate = n / (time.perf_counter() - t)
+
+    hands, boards = random_hands(rng, n_treys)
+    hand_lists, board_lists = hands.tolist(), boards.tolist()
+    t = time.perf_counter()
+    expected = [treys_evaluator.evaluate(h, b) for h, b in zip(hand_lists, board_lists)]
+    treys_rate = n_treys / (time.perf_counter() - t)
+    t = time.perf_counter()
+    single = [numpy_evaluator.evaluate(h, b) for h, b in zip(hand_lists, board_lists)]
+    single_rate = n_treys / (time.perf_counter() - t)
+
+    assert (numpy_evaluator.evaluate_many(hands, boards) == expected).all()
+    assert single == expected
+    return {'build_seconds': build_seconds, 'treys_hands_per_s': treys_rate, 'numpy_hands_per_s': single_rate,
+            'numpy_batched_hands_per_s': numpy_rate, 'batched_hands': n}
+
+
+def main():
+    args = parse()
+    result = bench_evaluator(args.n_hands, args.n_treys, args.batch, args.seed)
+    print('tables built in {:.3f}s'.format(result['build_seconds']))
+    print('treys Evaluator.evaluate:        {:>12,.0f} hands/s'.format(result['treys_hands_per_s']))
+    print('NumpyEvaluator.evaluate:         {:>12,.0f} hands/s'.format(result['numpy_hands_per_s']))
+    print('NumpyEvaluator.evaluate_many:    {:>12,.0f} hands/s ({:,} hands)'.format(
+        result['numpy_batched_hands_per_s'], result['batched_hands']))
+    print('speedup (batched / treys):       {:>12.1f}x'.format(
+        result['numpy_batched_hands_per_s'] / result['treys_hands_per_s']))
+
+
+if __name__ == '__main__':
+    main()
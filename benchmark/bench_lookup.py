@@ -0,0 +1,95 @@
+"""
+agent.lookupModel decision time: a strategy table is trained with a short CFR run, written as a StrategyStore and
+played by the agent in both seats, every `takeAction` call is timed.
+
+    python -m benchmark.bench_lookup --iterations 500 --n_decisions 50000 --max_us 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from holdem import TexasHoldemEnv
+from holdem.cfr import CFRSolver
+from holdem.evaluator import get_numpy_evaluator
+
+from agent.lookupAgent import lookupModel
+
+
+def time_decisions(model, n_decisions, seed=0, stack=1000):
+    """ seconds of each `takeAction` call of `model` playing heads-up against itself """
+    env = TexasHoldemEnv(2, headless=True, evaluator=get_numpy_evaluator())
+    env.add_player(0, stack=stack)
+    env.add_player(1, stack=stack)
+    env.seed(seed)
+    model.attach(env)
+    times = []
+    perf_counter = time.perf_counter
+    while len(times) < n_decisions:
+        env.episode_reset()
+        for p in env._seats:
+            p.__init__(p.player_id, stack)
+            p.set_seat(p.player_id)
+        while not env.episode_end and len(times) < n_decisions:
+            state, terminal = env.reset()
+            valid_actions = env.get_valid_actions(env._current_player)
+            while not terminal:
+                playerid = env._current_player.player_id
+                t = perf_counter()
+                action = model.takeAction(state, playerid, valid_actions)
+                times.append(perf_counter() - t)
+                actions = [[0, 0], [0, 0]]
+                actions[playerid] = [action.action, action.amount]
+                state, _, terminal, valid_actions = env.step(actions)
+    return np.array(times[:n_decisions])
+
+
+def bench_lookup(iterations=200, n_decisions=20000, seed=0, max_us=10.0):
+    """
+    decisions per second, mean / median / p99 decision time in microseconds, share of unknown information sets and
+    whether the median is at most `max_us` (the mean also counts the times the process was preempted in a decision)
+    """
+    solver = CFRSolver(seed=seed)
+    solver.iterate(iterations)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'strategy.npy')
+        solver.policy().to_store(path)
+        model = lookupModel(path, seed=seed)
+        time_decisions(model, min(n_decisions, 1000), seed + 1)
+        times = time_decisions(model, n_decisions, seed)
+        size = os.path.getsize(path)
+        unknown = model.unknown / float(model.decisions)
+        del model
+    us = times * 1e6
+    return {'decisions': n_decisions, 'infosets': len(solver.table), 'file_bytes': size,
+            'decisions_per_s': n_decisions / times.sum(), 'mean_us': us.mean(), 'p50_us': np.median(us),
+            'p99_us': np.percentile(us, 99), 'unknown': unknown, 'max_us': max_us,
+            'met': bool(np.median(us) <= max_us)}
+
+
+def parse():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=200, help='CFR iterations of the strategy table')
+    parser.add_argument('--n_decisions', type=int, default=20000)
+    parser.add_argument('--max_us', type=float, default=10.0,
+                        help='fail (exit status 1) when the median decision time is above')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse()
+    result = bench_lookup(args.iterations, args.n_decisions, args.seed, args.max_us)
+    print('{:,} information sets ({:,} file bytes), {:,} decisions ({:.1%} unknown): mean {:.2f} us, median {:.2f} us, '
+          'p99 {:.2f} us'.format(result['infosets'], result['file_bytes'], result['decisions'], result['unknown'],
+                                 result['mean_us'], result['p50_us'], result['p99_us']))
+    if not result['met']:
+        print('NOT MET: median decision time above {} us'.format(args.max_us))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
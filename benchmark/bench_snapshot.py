@@ -0,0 +1,70 @@
+"""
+TexasHoldemEnv state snapshots: `get_state`, `set_state` and `clone` throughput on positions of a played game.
+
+    python -m benchmark.bench_snapshot --n_states 2000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from holdem import safe_actions
+
+from .bench_env import make_env, new_episode
+
+
+def collect_snapshots(env, n_states, seed=0):
+    """ `get_state` arrays of the decision points of a game played with `safe_actions` """
+    env.seed(seed)
+    states = []
+    new_episode(env)
+    while len(states) < n_states:
+        if env.episode_end:
+            new_episode(env)
+        state, terminal = env.reset()
+        while not terminal and len(states) < n_states:
+            states.append(env.get_state().copy())
+            state, _, terminal, _ = env.step(safe_actions(state, env.n_seats))
+    return states
+
+
+def bench_snapshot(n_seats=2, n_states=2000, seed=0):
+    """ get_state, set_state and clone calls per second, and the state size in bytes """
+    env = make_env(n_seats)
+    states = collect_snapshots(env, n_states, seed)
+    out = np.empty_like(states[0])
+    t = time.perf_counter()
+    for state in states:
+        env.set_state(state)
+    set_rate = n_states / (time.perf_counter() - t)
+    t = time.perf_counter()
+    for _ in range(n_states):
+        env.get_state(out)
+    get_rate = n_states / (time.perf_counter() - t)
+    t = time.perf_counter()
+    for _ in range(n_states):
+        env.clone()
+    clone_rate = n_states / (time.perf_counter() - t)
+    return {'states': n_states, 'state_bytes': out.nbytes, 'get_state_per_s': get_rate,
+            'set_state_per_s': set_rate, 'clone_per_s': clone_rate}
+
+
+def parse():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n_states', type=int, default=2000)
+    parser.add_argument('--seats', type=int, nargs='+', default=[2, 4, 10])
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse()
+    for n_seats in args.seats:
+        result = bench_snapshot(n_seats, args.n_states, args.seed)
+        print('{:>2} seats ({} bytes): get_state {:>7.1f} us, set_state {:>7.1f} us, clone {:>7.1f} us'.format(
+            n_seats, result['state_bytes'], 1e6 / result['get_state_per_s'], 1e6 / result['set_state_per_s'],
+            1e6 / result['clone_per_s']))
+
+
+if __name__ == '__main__':
+    main()
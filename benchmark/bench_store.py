@@ -0,0 +1,73 @@
+"""
+StrategyStore lookups: rows kept in memory, rows read from the memory mapped file, writes with evictions.
+
+    python -m benchmark.bench_store --n_keys 1000000 --capacity 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from holdem.infoset import StrategyStore
+
+
+def bench_store(n_keys=200000, capacity=20000, n_actions=6, n_lookups=100000, seed=0):
+    """ get calls per second on cached and on file rows, set calls per second, file bytes per row """
+    rng = np.random.default_rng(seed)
+    keys = np.unique(rng.integers(1, 1 << 63, n_keys, dtype=np.uint64))
+    strategy = rng.random((len(keys), n_actions)).astype(np.float32)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = StrategyStore.build(os.path.join(tmp, 'store.npy'), keys, strategy, capacity=capacity)
+        hot = keys[:capacity].tolist()
+        for key in hot:
+            store.get(key)
+        t = time.perf_counter()
+        for i in range(n_lookups):
+            store.get(hot[i % capacity])
+        hot_rate = n_lookups / (time.perf_counter() - t)
+        # the rows in memory are always the last `capacity` ones, every lookup of the cycle reads the file
+        cold = keys[rng.integers(capacity, len(keys), n_lookups)].tolist()
+        store.capacity = 0
+        t = time.perf_counter()
+        for key in cold:
+            store.get(key)
+        cold_rate = n_lookups / (time.perf_counter() - t)
+        store.capacity = capacity
+
+        writes = os.path.join(tmp, 'writes.npy')
+        written = StrategyStore(writes, n_actions=n_actions, capacity=capacity)
+        values = strategy[0]
+        new_keys = keys[:n_lookups].tolist()
+        t = time.perf_counter()
+        for key in new_keys:
+            written[key] = values
+        written.flush()
+        set_rate = len(new_keys) / (time.perf_counter() - t)
+        file_bytes = os.path.getsize(store.path) / len(store)
+        del store, written
+    return {'keys': len(keys), 'capacity': capacity, 'get_cached_per_s': hot_rate, 'get_file_per_s': cold_rate,
+            'set_per_s': set_rate, 'file_bytes_per_row': file_bytes}
+
+
+def parse():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n_keys', type=int, default=200000)
+    parser.add_argument('--capacity', type=int, default=20000, help='rows kept in memory')
+    parser.add_argument('--n_lookups', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse()
+    result = bench_store(args.n_keys, args.capacity, n_lookups=args.n_lookups, seed=args.seed)
+    print('{:,} rows ({:.0f} file bytes/row), {:,} in memory: get {:.2f} us (memory), {:.2f} us (file), '
+          'set {:.2f} us'.format(result['keys'], result['file_bytes_per_row'], result['capacity'],
+                                 1e6 / result['get_cached_per_s'], 1e6 / result['get_file_per_s'],
+                                 1e6 / result['set_per_s']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Memory held per TexasHoldemEnv table (players seated, one cycle dealt), for pools of many tables.
+
+    python -m benchmark.bench_tables --n_tables 2000
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from holdem.evaluator import get_numpy_evaluator
+
+from .bench_env import make_env
+
+
+def bench_tables(n_seats=2, n_tables=1000, obs_mode='tuple'):
+    """ bytes allocated per table and per seated player (tracemalloc), tables created per second """
+    get_numpy_evaluator()
+    make_env(n_seats, obs_mode).reset()
+    t = time.perf_counter()
+    for _ in range(n_tables):
+        make_env(n_seats, obs_mode).reset()
+    seconds = time.perf_counter() - t
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    tables = []
+    for _ in range(n_tables):
+        env = make_env(n_seats, obs_mode)
+        env.reset()
+        tables.append(env)
+    end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    table_bytes = sum(stat.size_diff for stat in end.compare_to(start, 'filename')) / n_tables
+    player = tables[0]._seats[0]
+    player_bytes = _object_bytes(player)
+    return {'tables': n_tables, 'bytes_per_table': table_bytes, 'bytes_per_player': player_bytes,
+            'tables_per_s': n_tables / seconds}
+
+
+def _object_bytes(obj):
+    """ size of an object and of its attribute dict, if any """
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def parse():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n_tables', type=int, default=2000)
+    parser.add_argument('--seats', type=int, nargs='+', default=[2, 4, 10])
+    parser.add_argument('--obs_modes', nargs='+', default=['tuple', 'array'])
+    return parser.parse_args()
+
+
+def main():
+    args = parse()
+    for n_seats in args.seats:
+        for obs_mode in args.obs_modes:
+            result = bench_tables(n_seats, args.n_tables, obs_mode)
+            print('{:>2} seats, {:<5} observations: {:>8,.0f} bytes/table, {:>4} bytes/player, {:>8,.0f} tables/s'
+                  .format(n_seats, obs_mode, result['bytes_per_table'], result['bytes_per_player'],
+                          result['tables_per_s']))
+
+
+if __name__ == '__main__':
+    main()
@@ -23,7 +23,10 @@ def parse():
                         help='define whether amount of blinds will increase in a episode')
     parser.add_argument('--log',
                         action='store_true',
-                        help='define whether to log or not')
+                        help='save the binary hand history in the log directory')
+    parser.add_argument('--headless',
+                        action='store_true',
+                        help='do not print the game, only the episode results')
     return parser.parse_args()
 
 
@@ -35,7 +38,7 @@ def episode(env, n_seats, model_list):
     while not env.episode_end:
         cur_state, cycle_terminal = env.reset()
         # if not env.episode_end and cycle_terminal:
-        if cycle_terminal:
+        if cycle_terminal and not arg_list.headless:
             # a cycle may terminate here because players may be "forced" to all in if they have a low stack
             env.render(mode=o_mode, cur_episode=i)
         if env.episode_end:
@@ -46,7 +49,8 @@ def episode(env, n_seats, model_list):
             actions = holdem.model_list_action(cur_state, n_seats=n_seats, model_list=model_list,
                                                valid_actions=valid_actions)
             cur_state, rews, cycle_terminal, valid_actions = env.step(actions)
-            env.render(mode=o_mode, cur_episode=i)
+            if not arg_list.headless:
+                env.render(mode=o_mode, cur_episode=i)
             if env.episode_end:
                 break
 
@@ -56,7 +60,7 @@ def episode(env, n_seats, model_list):
 if __name__ == "__main__":
     arg_list = parse()
 
-    game_env = gym.make('TexasHoldem-v0')
+    game_env = gym.make('TexasHoldem-v0', headless=arg_list.headless)
     if arg_list.no_blind_increment:
         game_env.blind_increment = False
         print((colored_output("No blind increment in episodes!"), 'magenta'))
@@ -70,14 +74,14 @@ if __name__ == "__main__":
     game_env.add_player(1, stack=1000)
     model_list.append(agent.randomModel())
 
+    history = None
     if arg_list.log:
-        game_env.log = True
         import random
-        import sys
 
-        log_name = 'log/' + 'game_log_' + ''.join(random.sample('123456789abcdefg', 10)) + '.log'
-        print('Log file will be saved at ', log_name)
-        sys.stdout = open(log_name, 'w+')
+        log_name = 'log/' + 'game_log_' + ''.join(random.sample('123456789abcdefg', 10))
+        print('Hand history will be saved at {}.*.hh'.format(log_name))
+        history = holdem.HandHistoryWriter(log_name)
+        game_env.add_listener(history)
     else:
         print(colored_output("The game log is not saved.", 'magenta'))
 
@@ -87,4 +91,7 @@ if __name__ == "__main__":
         game_env.episode_reset()
         for p in game_env._seats:
             p.__init__(p.player_id,1000)
+            p.set_seat(p.player_id)
         episode(game_env, game_env.n_seats, model_list)
+    if history is not None:
+        history.close()
@@ -2,6 +2,17 @@
 from gym.envs.registration import register
 
 from .env import TexasHoldemEnv
+from .vector_env import BatchTexasHoldemEnv
+from .evaluator import get_evaluator, get_numpy_evaluator, NumpyEvaluator
+from .history import HandHistoryWriter, history_event, read_history, history_files, RECORD_DTYPE
+from .replay import replay_history, parallel_replay, REPLAY_STEP
+from .equity import preflop_equity, preflop_equity_many, estimate_equity, estimate_state_equity, EQUITY_ESTIMATE
+from .encoder import ObservationEncoder
+from .abstraction import ActionAbstraction, abstract_action
+from .async_loop import play_tables, run_tables, AsyncAgent, RemoteAgent, LocalAgentServer
+from .broker import InferenceBroker, BrokeredAgent
+from .infoset import StrategyStore, infoset_key, history_key, extend_history
+from .cfr import CFRSolver, CFRPolicy, HandBuckets, BettingHistory
 from .utils import card_to_str, hand_to_str, safe_actions, model_list_action, action_table, card_str_to_list, PLAYER_STATE, COMMUNITY_STATE, STATE, ACTION, card_to_normal_str
 register(
 	id='TexasHoldem-v0',
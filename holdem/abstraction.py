@@ -0,0 +1,129 @@
+from bisect import bisect
+
+import numpy as np
+
+from gym import error
+
+from .utils import ACTION, action_table
+
+
+class abstract_action():
+    FOLD = 0
+    CHECK_CALL = 1
+    # then one raise per pot fraction, the last abstract action is ALL_IN (the largest legal raise)
+    RAISE = 2
+
+
+class ActionAbstraction(object):
+    """
+    Fixed set of abstract actions: fold, check/call, a raise of each fraction of the pot, all-in.
+    A raise of fraction f adds tocall + f * (pot + tocall) chips (f times the pot once called), it is legal when
+    the amount is in the raise range and below the largest raise, all-in raises the largest amount.
+    Masks and actions are computed from the `_output_state` table state and `get_valid_actions` of the env.
+    """
+
+    def __init__(self, raise_fractions=(0.5, 1.0, 2.0)):
+        self.raise_fractions = tuple(raise_fractions)
+        self.n_actions = 3 + len(self.raise_fractions)
+        self.all_in = self.n_actions - 1
+        # closest fraction lookup: the sorted fractions and the midpoints between them
+        order = sorted(range(len(self.raise_fractions)), key=lambda i: self.raise_fractions[i])
+        fractions = [self.raise_fractions[i] for i in order]
+        self._midpoints = [(a + b) / 2 for a, b in zip(fractions, fractions[1:])]
+        self._closest = [abstract_action.RAISE + i for i in order]
+
+    def raise_amount(self, index, table_state):
+        """ chips of the raise of abstract action `index` """
+        if index == self.all_in:
+            return table_state['maxraise']
+        tocall = table_state['tocall']
+        return int(tocall + self.raise_fractions[index - abstract_action.RAISE] * (table_state['pot'] + tocall))
+
+    def mask(self, table_state, valid_actions, out=None):
+        """ bool array (n_actions,) of the legal abstract actions """
+        if out is None:
+            out = np.zeros(self.n_actions, dtype=bool)
+        out[:] = 0
+        if not valid_actions:
+            return out
+        out[abstract_action.FOLD] = valid_actions['fold']
+        out[abstract_action.CHECK_CALL] = valid_actions['check'] or valid_actions['call']
+        if valid_actions['raise']:
+            minraise, maxraise = valid_actions['raise_range']
+            for index in range(abstract_action.RAISE, self.all_in):
+                out[index] = minraise <= self.raise_amount(index, table_state) < maxraise
+            out[self.all_in] = True
+        return out
+
+    def legal_amounts(self, valid_actions, tocall, pot, raises=True):
+        """
+        lists of the legal abstract actions and of their chips (`mask` and the `to_action` amounts without NumPy
+        nor table state, for per decision code), raises are left out when `raises` is False
+        """
+        legal, amounts = [], []
+        if not valid_actions:
+            return legal, amounts
+        if valid_actions['fold']:
+            legal.append(abstract_action.FOLD)
+            amounts.append(0)
+        if valid_actions['call']:
+            legal.append(abstract_action.CHECK_CALL)
+            amounts.append(valid_actions['call_amount'])
+        elif valid_actions['check']:
+            legal.append(abstract_action.CHECK_CALL)
+            amounts.append(0)
+        if raises and valid_actions['raise']:
+            minraise, maxraise = valid_actions['raise_range']
+            base = pot + tocall
+            index = abstract_action.RAISE
+            for fraction in self.raise_fractions:
+                amount = int(tocall + fraction * base)
+                if minraise <= amount < maxraise:
+                    legal.append(index)
+                    amounts.append(amount)
+                index += 1
+            legal.append(self.all_in)
+            amounts.append(maxraise)
+        return legal, amounts
+
+    def legal_amount(self, index, valid_actions, tocall, pot, raises=True):
+        """ chips of abstract action `index` as in `legal_amounts`, None when it is not legal """
+        if not valid_actions:
+            return None
+        if index == abstract_action.FOLD:
+            return 0 if valid_actions['fold'] else None
+        if index == abstract_action.CHECK_CALL:
+            if valid_actions['call']:
+                return valid_actions['call_amount']
+            return 0 if valid_actions['check'] else None
+        if not (raises and valid_actions['raise']):
+            return None
+        minraise, maxraise = valid_actions['raise_range']
+        if index == self.all_in:
+            return maxraise
+        amount = int(tocall + self.raise_fractions[index - abstract_action.RAISE] * (pot + tocall))
+        return amount if minraise <= amount < maxraise else None
+
+    def to_abstract(self, action, amount, table_state):
+        """ abstract action of a concrete action: raises go to the closest pot fraction, the largest raise is all-in """
+        if action == action_table.FOLD:
+            return abstract_action.FOLD
+        if action != action_table.RAISE:
+            return abstract_action.CHECK_CALL
+        if amount >= table_state['maxraise']:
+            return self.all_in
+        tocall = table_state['tocall']
+        return self._closest[bisect(self._midpoints, (amount - tocall) / max(table_state['pot'] + tocall, 1))]
+
+    def to_action(self, index, table_state):
+        """ concrete ACTION of abstract action `index` """
+        if index == abstract_action.FOLD:
+            return ACTION(action_table.FOLD, 0)
+        if index == abstract_action.CHECK_CALL:
+            tocall = min(table_state['tocall'], table_state['stack'])
+            if tocall > 0:
+                return ACTION(action_table.CALL, tocall)
+            return ACTION(action_table.CHECK, 0)
+        if abstract_action.RAISE <= index < self.n_actions:
+            return ACTION(action_table.RAISE, self.raise_amount(index, table_state))
+        raise error.Error('invalid abstract action ({}), must be in [0, {})'.format(index, self.n_actions))
@@ -0,0 +1,121 @@
+import asyncio
+import inspect
+import json
+
+from .utils import ACTION, COMMUNITY_STATE, PLAYER_STATE, STATE, action_table
+
+
+async def async_model_list_action(cur_state, n_seats, model_list, valid_actions):
+    """ same as `model_list_action`, `takeAction` may be a coroutine (it is awaited) or a plain method """
+    current_player = cur_state.community_state.current_player
+    actions = [[action_table.CHECK, action_table.NA]] * n_seats
+
+    model_decision = model_list[current_player].takeAction(cur_state, current_player, valid_actions)
+    if inspect.isawaitable(model_decision):
+        model_decision = await model_decision
+    actions[current_player] = [model_decision.action, model_decision.amount]
+    return actions
+
+
+async def play_episode_async(env, models, stack=1000):
+    """ `holdem.tournament.play_episode` with awaited agents, other tables run while an agent waits """
+    env.episode_reset()
+    for p in env._seats:
+        p.__init__(p.player_id, stack)
+        p.set_seat(p.player_id)
+    while not env.episode_end:
+        cur_state, cycle_terminal = env.reset()
+        if env.episode_end:
+            break
+        valid_actions = env.get_valid_actions(env._current_player)
+        while not cycle_terminal:
+            actions = await async_model_list_action(cur_state, env.n_seats, models, valid_actions)
+            cur_state, rews, cycle_terminal, valid_actions = env.step(actions)
+            if env.episode_end:
+                break
+    return [p.stack for p in env._seats]
+
+
+async def play_tables(envs, model_lists, n_episodes=1, stack=1000):
+    """
+    Play `n_episodes` episodes on every env concurrently, table i is played by model_lists[i].
+    Returns the final stacks of every episode, per table.
+    """
+    async def play_table(env, models):
+        return [await play_episode_async(env, models, stack) for _ in range(n_episodes)]
+
+    return await asyncio.gather(*(play_table(env, models) for env, models in zip(envs, model_lists)))
+
+
+def run_tables(envs, model_lists, n_episodes=1, stack=1000):
+    """ `play_tables` from synchronous code """
+    return asyncio.run(play_tables(envs, model_lists, n_episodes, stack))
+
+
+class AsyncAgent(object):
+    """
+    Async wrapper of a synchronous agent. With an `executor` (e.g. a ThreadPoolExecutor) a slow `takeAction`
+    runs there and the event loop keeps playing the other tables meanwhile.
+    """
+
+    def __init__(self, agent, executor=None):
+        self.agent = agent
+        self.executor = executor
+
+    async def takeAction(self, state, playerid, valid_actions):
+        if self.executor is None:
+            return self.agent.takeAction(state, playerid, valid_actions)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.agent.takeAction, state, playerid, valid_actions)
+
+
+def encode_request(state, playerid, valid_actions):
+    """ JSON message of a decision request """
+    return json.dumps({
+        'player_states': [list(p) for p in state.player_states],
+        'community_state': list(state.community_state),
+        'community_card': list(state.community_card),
+        'playerid': playerid,
+        'valid_actions': valid_actions,
+    })
+
+
+def decode_request(message):
+    """ (state, playerid, valid_actions) of a message written by `encode_request` """
+    request = json.loads(message)
+    state = STATE(tuple(PLAYER_STATE(*p) for p in request['player_states']),
+                  COMMUNITY_STATE(*request['community_state']), request['community_card'])
+    return state, request['playerid'], request['valid_actions']
+
+
+class LocalAgentServer(object):
+    """
+    In-process stand-in for a remote agent server: requests and replies go through the JSON messages of
+    `encode_request`, the agent (sync or async) answers after `latency` seconds (a simulated round trip).
+    """
+
+    def __init__(self, agent, latency=0.0):
+        self.agent = agent
+        self.latency = latency
+        self.requests = 0
+
+    async def request(self, message):
+        state, playerid, valid_actions = decode_request(message)
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        decision = self.agent.takeAction(state, playerid, valid_actions)
+        if inspect.isawaitable(decision):
+            decision = await decision
+        return json.dumps([decision.action, decision.amount])
+
+
+class RemoteAgent(object):
+    """ async agent asking a server (an object with `async request(message)`, e.g. LocalAgentServer) """
+
+    def __init__(self, server):
+        self.server = server
+
+    async def takeAction(self, state, playerid, valid_actions):
+        reply = await self.server.request(encode_request(state, playerid, valid_actions))
+        return ACTION(*json.loads(reply))
@@ -0,0 +1,104 @@
+import asyncio
+
+import numpy as np
+
+from .abstraction import ActionAbstraction
+from .encoder import ObservationEncoder
+
+
+class InferenceBroker(object):
+    """
+    Group the decisions of many tables into batched model calls.
+    `model_fn(observations)` gets a (B, size) array and returns B outputs (an array or a list), row i answers
+    observation i. Requests are queued by `await submit(observation)`, the queue runs through the model when it
+    holds `max_batch_size` observations or `max_wait` seconds after its first request, whichever comes first.
+    """
+
+    def __init__(self, model_fn, size, max_batch_size=256, max_wait=0.002, dtype=np.float32):
+        self.model_fn = model_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._buffer = np.zeros((max_batch_size, size), dtype=dtype)
+        self._futures = []
+        self._timer = None
+        self.batches = 0
+        self.decisions = 0
+
+    async def submit(self, observation):
+        """ queue one observation (copied into the batch buffer), return its model output """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._buffer[len(self._futures)] = observation
+        self._futures.append(future)
+        if len(self._futures) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self.flush)
+        return await future
+
+    def flush(self):
+        """ run the queued observations through the model now """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        futures, self._futures = self._futures, []
+        if not futures:
+            return
+        try:
+            outputs = self.model_fn(self._buffer[:len(futures)])
+        except Exception as e:
+            for future in futures:
+                # the agent awaiting it may have been cancelled
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.decisions += len(futures)
+        for future, output in zip(futures, outputs):
+            if not future.done():
+                future.set_result(output)
+
+    def infer(self, observations):
+        """ synchronous path for observations already stacked (e.g. by BatchTexasHoldemEnv), by max_batch_size chunks """
+        outputs = [self.model_fn(observations[i:i + self.max_batch_size])
+                   for i in range(0, len(observations), self.max_batch_size)]
+        self.batches += len(outputs)
+        self.decisions += len(observations)
+        return np.concatenate(outputs) if outputs else np.zeros(0)
+
+    @property
+    def mean_batch_size(self):
+        return self.decisions / self.batches if self.batches else 0.0
+
+
+class BrokeredAgent(object):
+    """
+    Async agent (see `holdem.async_loop`) whose decisions go through an InferenceBroker.
+    The observation is encoded with `encoder`, the model output is a score per abstract action of `abstraction`
+    and the best legal one is played.
+    """
+
+    def __init__(self, broker, encoder=None, abstraction=None):
+        self.broker = broker
+        self.encoder = encoder if encoder is not None else ObservationEncoder()
+        self.abstraction = abstraction if abstraction is not None else ActionAbstraction()
+
+    async def takeAction(self, state, playerid, valid_actions):
+        scores = await self.broker.submit(self.encoder.encode(state, playerid))
+        table_state = table_state_from_observation(state, playerid, valid_actions)
+        mask = self.abstraction.mask(table_state, valid_actions)
+        index = int(np.argmax(np.where(mask, scores, -np.inf)))
+        return self.abstraction.to_action(index, table_state)
+
+
+def table_state_from_observation(state, playerid, valid_actions):
+    """ the `_output_state` fields used by ActionAbstraction, rebuilt from what an agent receives """
+    player = state.player_states[playerid]
+    raise_range = valid_actions.get('raise_range') or [0, 0]
+    return {
+        'tocall': state.community_state.to_call,
+        'stack': player.stack,
+        'pot': state.community_state.totalpot,
+        'minraise': raise_range[0],
+        'maxraise': raise_range[1],
+    }
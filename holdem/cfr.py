@@ -0,0 +1,419 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from gym import error
+
+from .abstraction import ActionAbstraction, abstract_action
+from .deck import CARD_INDEX, FULL_DECK
+from .env import TexasHoldemEnv
+from .equity import COMBO_CARDS, COMBO_INDEX, PREFLOP_EQUITY_1326
+from .evaluator import get_numpy_evaluator
+from .infoset import HISTORY_START, StrategyStore, extend_history
+from .utils import action_table
+
+# treys cards of the 1326 two card combos
+COMBO_TREYS = FULL_DECK[COMBO_CARDS]
+# CARD_COMBOS[c]: the 51 combos holding card index c
+CARD_COMBOS = COMBO_INDEX[~np.eye(52, dtype=bool)].reshape(52, 51).astype(np.int64)
+# above every hand rank
+_RANK_OFFSET = 1 << 13
+_CARD_OFFSETS = np.arange(52, dtype=np.int64)[:, None] * _RANK_OFFSET
+
+
+class HandBuckets(object):
+    """
+    Card abstraction: the equity of a hand against a random hand, cut in `n_buckets` equal ranges.
+    Preflop the equity is the table of `holdem.equity.preflop_equity`, after the flop it is the hand strength
+    against every opponent hand on the current board (the cards to come are not rolled out). The strength of the
+    1326 hands is computed at once per board and kept for the next `cache_size` boards.
+    """
+
+    def __init__(self, n_buckets=8, evaluator=None, cache_size=256):
+        self.n_buckets = n_buckets
+        self._evaluator = evaluator if evaluator is not None else get_numpy_evaluator()
+        self._combo_index = COMBO_INDEX.tolist()
+        preflop = np.asarray(PREFLOP_EQUITY_1326, dtype=np.float64)
+        self._preflop = (preflop, self._to_buckets(preflop))
+        self._cache = {}
+        self._cache_size = cache_size
+
+    def _to_buckets(self, equity):
+        return np.minimum((equity * self.n_buckets).astype(np.int64), self.n_buckets - 1).tolist()
+
+    def board_strength(self, board):
+        """
+        (1326,) hand strength of every combo (by COMBO_INDEX) on `board`, treys cards, nan for the combos holding a
+        board card. The opponent hands sharing a card with a combo are removed by counting, for each card, the ranks
+        of the combos holding it.
+        """
+        dead = np.zeros(52, dtype=bool)
+        dead[[CARD_INDEX[c] for c in board]] = True
+        valid = np.flatnonzero(~dead[COMBO_CARDS].any(axis=1))
+        # 0 for the combos holding a board card: never better, worse or tied with a hand
+        ranks = np.zeros(len(COMBO_CARDS), dtype=np.int64)
+        hands = COMBO_TREYS[valid]
+        ranks[valid] = self._evaluator.evaluate_many(
+            hands, np.broadcast_to(np.array(board, dtype=np.int64), (len(hands), len(board))))
+        rank = ranks[valid]
+        sorted_ranks = np.sort(rank)
+        above = np.searchsorted(sorted_ranks, rank, 'right')
+        worse = len(rank) - above
+        ties = above - np.searchsorted(sorted_ranks, rank, 'left')
+        n = np.full(len(rank), len(rank))
+        # ranks of the combos of each card, sorted in one array: row c is offset by c * _RANK_OFFSET
+        card_ranks = np.sort(ranks[CARD_COMBOS], axis=1)
+        card_counts = np.count_nonzero(card_ranks, axis=1)
+        flat = (card_ranks + _CARD_OFFSETS).ravel()
+        for cards in COMBO_CARDS[valid].T:
+            query = rank + cards * _RANK_OFFSET
+            right = np.searchsorted(flat, query, 'right')
+            worse -= 51 * (cards + 1) - right
+            ties -= right - np.searchsorted(flat, query, 'left')
+            n -= card_counts[cards]
+        # the combo itself was removed with each of its two cards
+        ties += 1
+        n += 1
+        strength = np.full(len(COMBO_CARDS), np.nan)
+        strength[valid] = (worse + 0.5 * ties) / n
+        return strength
+
+    def _board(self, board):
+        """ (strengths, buckets) of a board, cached """
+        entry = self._cache.get(board)
+        if entry is None:
+            strength = self.board_strength(board)
+            entry = (strength, self._to_buckets(np.nan_to_num(strength)))
+            if len(self._cache) >= self._cache_size:
+                self._cache.clear()
+            self._cache[board] = entry
+        return entry
+
+    def buckets(self, board):
+        """ list of the buckets of the 1326 combos on `board` (by COMBO_INDEX, 0 for combos holding a board card) """
+        return self._board(tuple(board))[1] if board else self._preflop[1]
+
+    def equity(self, hand, board):
+        entry = self._board(tuple(board)) if board else self._preflop
+        return float(entry[0][self._combo_index[CARD_INDEX[hand[0]]][CARD_INDEX[hand[1]]]])
+
+    def bucket(self, hand, board):
+        entry = self._board(tuple(board)) if board else self._preflop
+        return entry[1][self._combo_index[CARD_INDEX[hand[0]]][CARD_INDEX[hand[1]]]]
+
+
+def decision_mask(abstraction, table_state, valid_actions, raises, max_raises, out=None):
+    """ legal abstract actions, without raises once the round had `max_raises` of them """
+    mask = abstraction.mask(table_state, valid_actions, out)
+    if raises >= max_raises:
+        mask[abstract_action.RAISE:] = False
+    return mask
+
+
+class BettingHistory(object):
+    """
+    Env listener (`env.add_listener(history)`) keeping the abstract actions of the current cycle and their
+    history key (the `env._history_key` of the table), and the board, as a player who only sees the game events would.
+    """
+
+    def __init__(self, abstraction):
+        self.abstraction = abstraction
+        self.actions = []
+        self.key = HISTORY_START
+        self.board = []
+        self.round = 0
+        self.raises = 0
+        self.button = -1
+
+    def __call__(self, event, info):
+        if event == 'cycle_start':
+            self.actions = []
+            self.key = HISTORY_START
+            self.board = []
+            self.round = 0
+            self.raises = 0
+            self.button = info['button']
+            self.stacks = list(info['stacks'])
+            self.bets = [0] * len(self.stacks)
+            self.pot = 0
+            self.in_hand = [bool(hand) for hand in info['hands']]
+            self._bet(info['sb'], info['smallblind'])
+            self._bet(info['bb'], info['bigblind'])
+        elif event == 'action':
+            if info['round'] != self.round:
+                self._new_round(info['round'])
+            seat, action = info['seat'], info['action']
+            index = self.abstract(seat, action, info['amount'])
+            self.actions.append(index)
+            self.key = extend_history(self.key, index)
+            if action == action_table.FOLD:
+                self.in_hand[seat] = False
+            elif action != action_table.CHECK:
+                self._bet(seat, info['amount'])
+            if index >= abstract_action.RAISE:
+                self.raises += 1
+        elif event == 'board':
+            self.board = self.board + info['cards']
+            if info['round'] != self.round:
+                self._new_round(info['round'])
+
+    def _new_round(self, round):
+        self.round = round
+        self.raises = 0
+        self.bets = [0] * len(self.bets)
+
+    def _bet(self, seat, chips):
+        chips = min(chips, self.stacks[seat])
+        self.stacks[seat] -= chips
+        self.bets[seat] += chips
+        self.pot += chips
+
+    def abstract(self, seat, action, amount):
+        """ abstract action of a concrete action of `seat`, before it is applied """
+        if action != action_table.RAISE:
+            return self.abstraction.to_abstract(action, amount, None)
+        stack = self.stacks[seat]
+        others = [s for i, s in enumerate(self.stacks) if i != seat and self.in_hand[i] and s > 0]
+        table_state = {'tocall': max(self.bets) - self.bets[seat], 'pot': self.pot,
+                       'maxraise': min(stack, max(others) if others else 0)}
+        return self.abstraction.to_abstract(action, min(amount, stack), table_state)
+
+    def position(self, seat):
+        return (seat - self.button) % len(self.stacks)
+
+
+class InfoSetTable(object):
+    """
+    Cumulated regrets and strategies, one dense row per information set, the row of a set is found by its key.
+    """
+
+    def __init__(self, n_actions, capacity=1024):
+        self.n_actions = n_actions
+        self.index = {}
+        self.keys = np.zeros(capacity, dtype=np.uint64)
+        self.regrets = np.zeros((capacity, n_actions))
+        self.strategy_sum = np.zeros((capacity, n_actions))
+
+    def __len__(self):
+        return len(self.index)
+
+    def row(self, key):
+        row = self.index.get(key)
+        if row is None:
+            row = len(self.index)
+            if row == len(self.keys):
+                self._grow(2 * len(self.keys))
+            self.index[key] = row
+            self.keys[row] = key
+        return row
+
+    def _grow(self, capacity):
+        n = len(self.index)
+        for name in ('keys', 'regrets', 'strategy_sum'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:n] = old[:n]
+            setattr(self, name, new)
+
+    def current_strategy(self, row, mask):
+        """ regret matching over the legal actions (uniform when no regret is positive) """
+        positive = np.where(mask, np.maximum(self.regrets[row], 0.0), 0.0)
+        total = positive.sum()
+        if total > 0:
+            return positive / total
+        return mask / mask.sum()
+
+    def average_strategy(self):
+        """ (len, n_actions) normalized strategy sums, rows never updated are all 0 """
+        sums = self.strategy_sum[:len(self)]
+        totals = sums.sum(axis=1, keepdims=True)
+        return np.divide(sums, totals, out=np.zeros_like(sums), where=totals > 0)
+
+    def arrays(self):
+        """ (keys, regrets, strategy_sum) of the used rows """
+        n = len(self)
+        return self.keys[:n], self.regrets[:n], self.strategy_sum[:n]
+
+    def add(self, keys, regrets, strategy_sum):
+        """ add the rows of another table (e.g. the updates of a worker) """
+        rows = np.array([self.row(key) for key in keys.tolist()], dtype=np.int64)
+        np.add.at(self.regrets, rows, regrets)
+        np.add.at(self.strategy_sum, rows, strategy_sum)
+
+
+class CFRPolicy(object):
+    """ average strategy of a solver, with O(1) lookups by information set key """
+
+    def __init__(self, keys, strategy, config):
+        self.keys = keys
+        self.strategy = strategy
+        self.config = config
+        self.index = dict(zip(keys.tolist(), range(len(keys))))
+        self.abstraction = ActionAbstraction(config['raise_fractions'])
+
+    def probabilities(self, key):
+        """ probabilities of the abstract actions in an information set, None for an unknown set """
+        row = self.index.get(key)
+        return None if row is None else self.strategy[row]
+
+    def to_store(self, path, capacity=65536):
+        """ write the strategy as a StrategyStore file (the config as its meta), see agent.lookupModel """
+        return StrategyStore.build(path, self.keys, self.strategy, capacity, meta=self.config)
+
+    def save(self, path):
+        np.savez(path, keys=self.keys, strategy=self.strategy, config=np.array(json.dumps(self.config)))
+
+    @staticmethod
+    def load(path):
+        data = np.load(path)
+        return CFRPolicy(data['keys'], data['strategy'], json.loads(str(data['config'])))
+
+
+class CFRSolver(object):
+    """
+    External sampling Monte Carlo CFR on the heads-up cycles of a TexasHoldemEnv: both players start every cycle
+    with `stack` chips, the blinds are BLIND_INCREMENTS[blind_level], the actions are those of an ActionAbstraction
+    (at most `max_raises` raises per round) played through `env.step`, the cards are abstracted by HandBuckets.
+    Each iteration deals a cycle and traverses it once for each player, branching with `env.get_state`/`set_state`.
+    """
+
+    def __init__(self, stack=1000, blind_level=0, raise_fractions=(0.5, 1.0, 2.0), n_buckets=8, max_raises=2,
+                 seed=0):
+        if not 0 <= blind_level < len(TexasHoldemEnv.BLIND_INCREMENTS):
+            raise error.Error('blind_level must be in [0, {})'.format(len(TexasHoldemEnv.BLIND_INCREMENTS)))
+        self.config = {'stack': stack, 'blind_level': blind_level, 'raise_fractions': list(raise_fractions),
+                       'n_buckets': n_buckets, 'max_raises': max_raises}
+        self.stack = stack
+        self.blind_level = blind_level
+        self.max_raises = max_raises
+        self.env = TexasHoldemEnv(2, headless=True, evaluator=get_numpy_evaluator(), obs_mode='array',
+                                  raise_fractions=raise_fractions)
+        self.env.add_player(0, stack=stack)
+        self.env.add_player(1, stack=stack)
+        self.env.seed(seed)
+        self.abstraction = self.env.action_abstraction
+        self.buckets = HandBuckets(n_buckets)
+        self.table = InfoSetTable(self.abstraction.n_actions)
+        self.rng = np.random.default_rng(seed)
+        self.iterations = 0
+        self._states = []
+        self._actions = [[action_table.CHECK, action_table.NA]] * 2
+
+    def _deal(self):
+        env = self.env
+        env.episode_reset()
+        env.blind_increment = False
+        env._blind_index = self.blind_level
+        # the button moves at reset: both players play both positions
+        env._button = self.iterations % 2
+        for p in env._seats:
+            p.__init__(p.player_id, self.stack)
+            p.set_seat(p.player_id)
+        return env.reset()[1]
+
+    def iterate(self, iterations=1):
+        """ run `iterations` iterations (one dealt cycle, traversed for each player) """
+        env = self.env
+        for _ in range(iterations):
+            terminal = self._deal()
+            if not terminal:
+                root = env.get_state()
+                for traverser in (0, 1):
+                    if traverser:
+                        env.set_state(root)
+                    self._traverse(traverser, 0, 0)
+            self.iterations += 1
+
+    def _traverse(self, traverser, depth, raises):
+        env = self.env
+        player = env._current_player
+        seat = player.player_id
+        table_state, valid_actions = env._decision_state()
+        mask = decision_mask(self.abstraction, table_state, valid_actions, raises, self.max_raises)
+        table = self.table
+        row = table.row(env.infoset_key(self.buckets.bucket(player.hand, env.community)))
+        sigma = table.current_strategy(row, mask)
+        if seat != traverser:
+            table.strategy_sum[row] += sigma
+            return self._play(traverser, depth, raises, self.rng.choice(len(sigma), p=sigma))
+
+        while depth >= len(self._states):
+            self._states.append(env.get_state())
+        state = env.get_state(self._states[depth])
+        utilities = np.zeros(len(sigma))
+        first = True
+        for index in np.flatnonzero(mask).tolist():
+            if not first:
+                env.set_state(state)
+            first = False
+            utilities[index] = self._play(traverser, depth, raises, index)
+        value = sigma.dot(utilities)
+        table.regrets[row] += np.where(mask, utilities - value, 0.0)
+        return value
+
+    def _play(self, traverser, depth, raises, index):
+        """ play abstract action `index`, return the traverser utility of the rest of the cycle """
+        env = self.env
+        round = env._round
+        action = env.abstract_to_action(index)
+        actions = list(self._actions)
+        actions[env._current_player.player_id] = [action.action, action.amount]
+        terminal = env.step(actions)[2]
+        if terminal:
+            return env._seats[traverser].stack - self.stack
+        if env._round != round:
+            raises = 0
+        elif index >= abstract_action.RAISE:
+            raises += 1
+        return self._traverse(traverser, depth + 1, raises)
+
+    def train(self, iterations, workers=1, sync_every=100):
+        """
+        Run `iterations` iterations. With several workers, every worker process runs `sync_every` iterations
+        from the current table with its own seed, then their regret and strategy updates are summed in the table;
+        the last round splits the iterations left between the workers.
+        """
+        if workers <= 1:
+            self.iterate(iterations)
+            return self
+        remaining = iterations
+        with ProcessPoolExecutor(workers) as pool:
+            while remaining > 0:
+                # `sync_every` iterations per worker, the last round spreads what is left over the workers
+                share = min(sync_every, remaining // workers)
+                extra = remaining - share * workers if share < sync_every else 0
+                counts = [n for n in (share + (i < extra) for i in range(workers)) if n]
+                keys, regrets, strategy_sum = self.table.arrays()
+                seeds = np.random.SeedSequence([self.rng.integers(1 << 32)]).generate_state(len(counts))
+                starts = self.iterations + np.cumsum([0] + counts[:-1])
+                tasks = [(self.config, keys, regrets, strategy_sum, int(seed), int(start), n)
+                         for seed, start, n in zip(seeds, starts, counts)]
+                for update in pool.map(_train_worker, tasks):
+                    self.table.add(*update)
+                self.iterations += sum(counts)
+                remaining -= sum(counts)
+        return self
+
+    def policy(self):
+        keys, _, _ = self.table.arrays()
+        return CFRPolicy(keys.copy(), self.table.average_strategy().astype(np.float32), dict(self.config))
+
+    def save(self, path):
+        """ save the average strategy, see CFRPolicy.load """
+        self.policy().save(path)
+
+
+def _train_worker(args):
+    """ worker: iterations from a copy of the table, return the updates (keys, regrets, strategy sums) """
+    config, keys, regrets, strategy_sum, seed, iteration, iterations = args
+    solver = CFRSolver(seed=seed, **config)
+    solver.iterations = iteration
+    solver.table.add(keys, regrets, strategy_sum)
+    solver.iterate(iterations)
+    new_keys, new_regrets, new_strategy_sum = solver.table.arrays()
+    new_regrets, new_strategy_sum = new_regrets.copy(), new_strategy_sum.copy()
+    n = len(keys)
+    new_regrets[:n] -= regrets
+    new_strategy_sum[:n] -= strategy_sum
+    return new_keys, new_regrets, new_strategy_sum
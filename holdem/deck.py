@@ -0,0 +1,58 @@
+import numpy as np
+
+from treys.deck import Deck
+
+# treys integer of every card, a card index (0..51) is a position in this array: 4 * rank + suit
+FULL_DECK = np.array(Deck.GetFullDeck(), dtype=np.int64)
+
+# treys suit bit (1, 2, 4, 8) -> 0..3
+SUIT_INDEX = [-1, 0, 1, -1, 2, -1, -1, -1, 3]
+_SUIT_INDEX = np.array(SUIT_INDEX, dtype=np.int64)
+
+# treys integer -> card index, for per-card lookups in pure python
+CARD_INDEX = dict(zip(FULL_DECK.tolist(), range(52)))
+
+
+def card_index(card):
+    """ index (0..51) of a treys card in FULL_DECK """
+    return ((card >> 8) & 0xF) * 4 + SUIT_INDEX[(card >> 12) & 0xF]
+
+
+def card_indices(cards):
+    """ card_index of an int array of treys cards """
+    cards = np.asarray(cards, dtype=np.int64)
+    return ((cards >> 8) & 0xF) * 4 + _SUIT_INDEX[(cards >> 12) & 0xF]
+
+
+class NumpyDeck(object):
+    """
+    Deck shuffled in place by a NumPy generator (the env's `np_random`), so that shuffles are
+    reproducible with `env.seed()` and independent between envs.
+    Same interface as treys' Deck: `shuffle()`, `draw(1)` returns a card, `draw(n)` a list of cards.
+    """
+
+    def __init__(self, np_random=None):
+        self.np_random = np_random if np_random is not None else np.random.default_rng()
+        self._cards = FULL_DECK.copy()
+        self._top = 0
+
+    def shuffle(self):
+        # from the sorted deck: the order depends on the generator only, not on the previous cycles
+        cards = self._cards
+        cards[:] = FULL_DECK
+        self.np_random.shuffle(cards)
+        self._top = 0
+
+    def draw(self, n=1):
+        top = self._top
+        if top + n > 52:
+            raise IndexError('not enough cards left in the deck')
+        self._top = top + n
+        if n == 1:
+            return int(self._cards[top])
+        return self._cards[top:top + n].tolist()
+
+    @property
+    def cards(self):
+        """ cards left, as a list of treys cards """
+        return self._cards[self._top:].tolist()
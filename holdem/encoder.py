@@ -0,0 +1,84 @@
+import numpy as np
+
+from gym import error
+
+from .deck import CARD_INDEX, card_indices
+
+
+class ObservationEncoder(object):
+    """
+    Encode a STATE observation, seen by one player, into a flat float array:
+    + cards='one_hot': 7 one-hot blocks of 52 (pocket cards, then the 5 community cards, zeros when not dealt)
+    + cards='bitmask': a 52 bitmask of the pocket cards, then a 52 bitmask of the community cards
+    + cards='combined': one 52 bitmask of the pocket and community cards
+    followed by [total pot, player stack, to call], in big blinds.
+    Card positions are the card indices of `holdem.deck.FULL_DECK` (4 * rank + suit).
+
+    `encode` writes into a buffer allocated once (or into `out`), the returned array is overwritten by the
+    next call, copy it to keep it. `encode_batch` does the same for many observations at once.
+    """
+
+    N_CHIP_FEATURES = 3
+
+    def __init__(self, cards='one_hot', dtype=np.float32):
+        if cards not in ('one_hot', 'bitmask', 'combined'):
+            raise error.Error('unknown card encoding: {}'.format(cards))
+        self.cards = cards
+        self.dtype = dtype
+        # offset of the 52 block of each card: pocket cards then community cards
+        if cards == 'one_hot':
+            self._offsets = [52 * i for i in range(7)]
+        elif cards == 'bitmask':
+            self._offsets = [0] * 2 + [52] * 5
+        else:
+            self._offsets = [0] * 7
+        self.n_card_features = self._offsets[-1] + 52
+        self.size = self.n_card_features + self.N_CHIP_FEATURES
+        self._buffer = np.zeros(self.size, dtype=dtype)
+        self._batch_buffer = np.zeros((0, self.size), dtype=dtype)
+        self._batch_cards = np.zeros((0, 7), dtype=np.int64)
+
+    def encode(self, state, playerid, out=None):
+        """ encode the observation of `playerid`, return `out` (or the encoder buffer) """
+        if out is None:
+            out = self._buffer
+        n = self.n_card_features
+        out[:n] = 0
+        offsets = self._offsets
+        player = state.player_states[playerid]
+        for i, card in enumerate(player.hand):
+            if card != -1:
+                out[offsets[i] + CARD_INDEX[card]] = 1
+        for i, card in enumerate(state.community_card):
+            if card != -1:
+                out[offsets[2 + i] + CARD_INDEX[card]] = 1
+        community = state.community_state
+        bigblind = float(community.bigblind or 1)
+        out[n] = community.totalpot / bigblind
+        out[n + 1] = player.stack / bigblind
+        out[n + 2] = community.to_call / bigblind
+        return out
+
+    def encode_batch(self, states, playerids, out=None):
+        """ encode observation i as seen by playerids[i], return an (N, size) array """
+        n_states = len(states)
+        if len(self._batch_cards) < n_states:
+            self._batch_buffer = np.zeros((n_states, self.size), dtype=self.dtype)
+            self._batch_cards = np.zeros((n_states, 7), dtype=np.int64)
+        if out is None:
+            out = self._batch_buffer[:n_states]
+        cards = self._batch_cards[:n_states]
+        n = self.n_card_features
+        for row, (state, playerid) in enumerate(zip(states, playerids)):
+            player = state.player_states[playerid]
+            cards[row, :2] = player.hand
+            cards[row, 2:] = state.community_card
+            community = state.community_state
+            bigblind = float(community.bigblind or 1)
+            out[row, n] = community.totalpot / bigblind
+            out[row, n + 1] = player.stack / bigblind
+            out[row, n + 2] = community.to_call / bigblind
+        out[:, :n] = 0
+        rows, slots = np.nonzero(cards != -1)
+        out[rows, np.asarray(self._offsets)[slots] + card_indices(cards[rows, slots])] = 1
+        return out
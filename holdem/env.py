@@ -1,79 +1,104 @@
 from gym import Env, error, spaces, utils
 from gym.utils import seeding
+import copy
 import sys
 
-from treys.evaluator import Evaluator
+import numpy as np
 from treys.card import Card
-from treys.deck import Deck
 from termcolor import colored
+from .abstraction import ActionAbstraction
+from .deck import NumpyDeck
+from .evaluator import get_evaluator
+from .infoset import HISTORY_START, extend_history, infoset_key
+from .observation import ArrayObservation, StateSpace, legal_action_mask
+from .profiling import EnvProfiler, PHASES
 from .player import Player
-from .utils import hand_to_str, format_action, PLAYER_STATE, COMMUNITY_STATE, STATE
+from . import snapshot
+from .utils import hand_to_str, format_action, action_table, PLAYER_STATE, COMMUNITY_STATE, STATE
+
+MOVE_TO_ACTION = {'check': action_table.CHECK, 'call': action_table.CALL, 'raise': action_table.RAISE,
+                  'fold': action_table.FOLD}
+
+
+# spaces by (n_seats, max_limit, obs_mode, n_abstract): their bound arrays are built once per configuration
+_SPACES = {}
+
+
+def _spaces(n_seats, max_limit, obs_mode, n_abstract):
+    """ (observation_space, action_space) of a table, copies of the spaces of its configuration """
+    key = (n_seats, max_limit, obs_mode, n_abstract)
+    if key not in _SPACES:
+        # flat int64 observation (see ArrayObservation), the 'dict' mode space is a Dict of the same blocks and the
+        # 'tuple' mode one holds the STATE namedtuples
+        layout = ArrayObservation(n_seats, n_abstract)
+        if obs_mode == 'dict':
+            observation_space = layout.dict_space(max_limit)
+        elif obs_mode == 'array':
+            observation_space = layout.flat_space(max_limit)
+        else:
+            observation_space = StateSpace(n_seats, max_limit)
+        # one [action_table id, amount] row per seat, as taken by step()
+        action_space = spaces.MultiDiscrete(np.array([[4, max_limit + 1]] * n_seats))
+        _SPACES[key] = (observation_space, action_space)
+    observation_space, action_space = _SPACES[key]
+    return _copy_space(observation_space), _copy_space(action_space)
+
+
+def _copy_space(space):
+    """ copy of a space sharing its bound arrays, with its own (not yet seeded) RNG """
+    if isinstance(space, spaces.Dict):
+        return spaces.Dict({name: _copy_space(s) for name, s in space.spaces.items()})
+    space = copy.copy(space)
+    space._np_random = None
+    return space
 
 
 class TexasHoldemEnv(Env, utils.EzPickle):
     BLIND_INCREMENTS = [[10, 20], [20, 40], [40, 80], [80, 160], [160, 320]]
 
-    def __init__(self, n_seats, max_limit=20000, debug=False):
-        self.log = False
-        n_suits = 4  # s,h,d,c
-        n_ranks = 13  # 2,3,4,5,6,7,8,9,T,J,Q,K,A
-        n_community_cards = 5  # flop, turn, river
-        n_pocket_cards = 2
-        n_stud = 5
+    OBS_MODES = ('tuple', 'array', 'dict')
 
+    def __init__(self, n_seats, max_limit=20000, debug=False, evaluator=None, headless=False, obs_mode='tuple',
+                 raise_fractions=(0.5, 1.0, 2.0)):
+        """
+        @param: evaluator, object with a treys-like `evaluate(hand, board)` method used at showdown,
+                the shared treys Evaluator by default, an evaluator with `evaluate_many` (e.g.
+                `holdem.evaluator.get_numpy_evaluator()`) ranks the hands of a multi-way showdown in one call
+        @param: headless, nothing is printed (render() does nothing), game events only go to the
+                listeners registered with `add_listener`
+        @param: obs_mode, observations returned by reset() and step():
+                'tuple', a STATE of namedtuples, built at every call
+                'array', the flat int64 array of a `holdem.observation.ArrayObservation`
+                'dict', the `blocks` dict of arrays of the ArrayObservation
+                the arrays are updated in place and returned at every call, copy them to keep them
+        @param: raise_fractions, pot fractions of the raises of the abstract action set (see `abstract_action_mask`)
+        The tables of a same configuration share the bounds of their observation and action spaces, each table has
+        its own spaces (and space RNGs).
+        """
+        if obs_mode not in TexasHoldemEnv.OBS_MODES:
+            raise error.Error('obs_mode must be one of {}, not {}'.format(TexasHoldemEnv.OBS_MODES, obs_mode))
+        self.obs_mode = obs_mode
+        self.action_abstraction = ActionAbstraction(raise_fractions)
+        n_abstract = self.action_abstraction.n_actions
+        self._array_obs = None if obs_mode == 'tuple' else ArrayObservation(n_seats, n_abstract)
+        self.log = False
+        self.headless = headless
+        self._listeners = [] if headless else [self._print_event]
+        self.profiler = None
         self.n_seats = n_seats
         # fill seats with dummy players
         self._seats = [Player(i, stack=0, emptyplayer=True) for i in range(self.n_seats)]
         self.emptyseats = self.n_seats
+        # seated players stay seated across episodes
+        self._player_dict = {}
+        # the deck is shuffled every cycle and the evaluator tables are shared, none is rebuilt per episode
+        self._deck = NumpyDeck()
+        self._evaluator = evaluator if evaluator is not None else get_evaluator()
+        self.seed()
 
         self.episode_reset()
 
-        self.observation_space = spaces.Tuple([
-            spaces.Tuple([  # # **players info**
-                             spaces.MultiDiscrete([
-                                 1,  # (boolean) is_emptyplayer
-                                 n_seats - 1,  # (numbers) number of seat
-                                 max_limit,  # (numbers) stack
-                                 1,  # (boolean) is_playing_hand
-                                 max_limit,
-                                 # (numbers) handrank, need_error_msg?  (0 could be no rank, no error_msg needed
-                                 1,  # (boolean) is_playedthisround
-                                 max_limit,  # (numbers) is_betting
-                                 1,  # (boolean) isallin
-                                 max_limit,  # (numbers) last side pot
-                             ]),
-                             spaces.Tuple([
-                                              spaces.MultiDiscrete([  # # **players hand**
-                                                  1,  # (boolean) is_avalible
-                                                  n_suits,  # (catagory) suit,
-                                                  n_ranks,  # (catagory) rank.
-                                              ])
-                                          ] * n_pocket_cards)
-                         ] * n_seats),
-            spaces.Tuple([
-                             spaces.Discrete(n_seats - 1),  # big blind location
-                             spaces.Discrete(max_limit),  # small blind
-                             spaces.Discrete(max_limit),  # big blind
-                             spaces.Discrete(max_limit * n_seats),  # pot amount
-                             spaces.Discrete(max_limit),  # last raise
-                             spaces.Discrete(max_limit),  # minimum amount to raise
-                             spaces.Discrete(max_limit),  # how much needed to call by current player.
-                             spaces.Discrete(n_seats - 1),  # current player seat location.
-                             spaces.MultiDiscrete([  # community cards
-                                 1,  # (boolean) is_avalible
-                                 n_suits,  # (catagory) suit
-                                 n_ranks,  # (catagory) rank
-                                 1,  # (boolean) is_flopped
-                             ]),
-                         ] * n_stud),
-        ])
-
-        self.action_space = spaces.Tuple([
-                                             spaces.MultiDiscrete([
-                                                 3,  # action_id
-                                                 max_limit,  # raise_amount
-                                             ]),
-                                         ] * n_seats)
+        self.observation_space, self.action_space = _spaces(n_seats, max_limit, obs_mode, n_abstract)
 
     def add_player(self, seat_id, stack=1000):
         """Add a player to the environment seat with the given stack (chipcount)"""
@@ -99,8 +124,113 @@ class TexasHoldemEnv(Env, utils.EzPickle):
         except ValueError:
             pass
 
+    def add_listener(self, listener):
+        """
+        Call `listener(event, info)` on every game event, `info` is a dict:
+            'cycle_start': {'sb', 'bb' (player ids), 'smallblind', 'bigblind', 'button', 'cycle', 'round',
+                            'stacks' (before the blinds), 'hands' (pocket cards, [] for seats not playing)}
+            'action': {'seat', 'round', 'action' (action_table id), 'amount' (raise/call amount, 0 otherwise)}
+            'board': {'round', 'cards' (the community cards just dealt)}
+            'pot': {'seat', 'round', 'amount'} chips paid to a player at the end of the cycle
+            'cycle_winner': {'player_id': player id} best hand of a pot won at showdown (not for an uncalled bet
+                            returned to its player, which is only a 'pot' event)
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def _emit(self, event, info):
+        for listener in self._listeners:
+            listener(event, info)
+
+    def _print_event(self, event, info):
+        """ console narration, the default listener when not headless """
+        if event == 'cycle_start':
+            print(self.colored_output(
+                'New Cycle starts. SB: player {}, BB: player {}. BB amount:{}'.format(info['sb'], info['bb'],
+                                                                                      info['bigblind']), 'magenta'))
+        elif event == 'cycle_winner':
+            print(self.colored_output("Cycle winner: {}".format(info['player_id']), 'magenta'))
+
+    def enable_profiling(self, dump_at_episode_end=None):
+        """
+        Time the env phases (reset, step, dealing, side pots, showdown, observations, validation) into a
+        `holdem.profiling.EnvProfiler`, returned and kept in `env.profiler`. Agents are timed by running
+        `env.profiler.wrap_models(model_list)`. Nothing is timed (nor slower) until profiling is enabled.
+            @param: dump_at_episode_end, see EnvProfiler
+        """
+        if self.profiler is None:
+            self.profiler = EnvProfiler(self, dump_at_episode_end).attach()
+        return self.profiler
+
+    def disable_profiling(self):
+        """ stop timing, return the profiler (its counters are kept) """
+        profiler, self.profiler = self.profiler, None
+        if profiler is not None:
+            profiler.detach()
+        return profiler
+
+    def get_state(self, out=None):
+        """
+        Full game state as a fixed size int64 array (see `holdem.snapshot`), written into `out` when given,
+        to branch from the current position with `set_state`.
+        """
+        return snapshot.get_state(self, out)
+
+    def set_state(self, state):
+        """ restore a state of `get_state`, the array observation is rewritten """
+        snapshot.set_state(self, state)
+        self._decision = None
+        if self._array_obs is not None:
+            self._get_observation(self.get_valid_actions(self._current_player) if self._can_act() else [])
+
+    def clone(self):
+        """
+        Copy of the table for rollouts: players, deck, pots and generator are copied, the evaluator is shared, the
+        spaces are copies with their own RNG, the copy has no listeners nor profiler.
+        """
+        env = TexasHoldemEnv.__new__(TexasHoldemEnv)
+        env.__dict__.update(self.__dict__)
+        if self.profiler is not None:
+            # the profiler timers of this env are instance attributes
+            for name in ['reset', 'step'] + [m for methods in PHASES.values() for m in methods]:
+                env.__dict__.pop(name, None)
+        env.profiler = None
+        env._listeners = []
+        env._decision = None
+        env.observation_space = _copy_space(self.observation_space)
+        env.action_space = _copy_space(self.action_space)
+        players = {id(p): p.copy() for p in self._seats}
+        env._seats = [players[id(p)] for p in self._seats]
+        env._player_dict = {k: players[id(p)] for k, p in self._player_dict.items()}
+        env._folded_players = [players[id(p)] for p in getattr(self, '_folded_players', [])]
+        env._current_player = players[id(self._current_player)] if self._current_player is not None else None
+        env._last_player = players[id(self._last_player)] if self._last_player is not None else None
+        env.community = list(self.community)
+        env._discard = list(self._discard)
+        env._side_pots = list(self._side_pots)
+        bit_generator = type(self.np_random.bit_generator)()
+        bit_generator.state = self.np_random.bit_generator.state
+        env.np_random = np.random.Generator(bit_generator)
+        env._deck = NumpyDeck(env.np_random)
+        env._deck._cards[:] = self._deck._cards
+        env._deck._top = self._deck._top
+        if self._array_obs is not None:
+            env._array_obs = ArrayObservation(self.n_seats, self.action_abstraction.n_actions)
+            env._array_obs.flat[:] = self._array_obs.flat
+        return env
+
+    def _can_act(self):
+        """ the current player has a decision to make (the cycle is not over) """
+        players = [p for p in self._seats if p.playing_hand]
+        return (self._current_player is not None and not self.episode_end and self._round < 4 and len(players) > 1
+                and not self._betting_closed(players))
+
     def seed(self, seed=None):
+        """ seed the env generator, which shuffles the deck """
         self.np_random, seed = seeding.np_random(seed)
+        self._deck.np_random = self.np_random
         return [seed]
 
     def episode_reset(self):
@@ -109,8 +239,6 @@ class TexasHoldemEnv(Env, utils.EzPickle):
         self._blind_index = 0
         [self._smallblind, self._bigblind] = TexasHoldemEnv.BLIND_INCREMENTS[0]
         self.blind_increment = True
-        self._deck = Deck()
-        self._evaluator = Evaluator()
 
         self.community = []
         self._round = 0
@@ -118,16 +246,16 @@ class TexasHoldemEnv(Env, utils.EzPickle):
         self._discard = []
 
         self._side_pots = [0] * self.n_seats
-        self._current_sidepot = 0  # index of _side_pots
         self._totalpot = 0
         self._tocall = 0
         self._lastraise = 0
         self._roundpot = 0
 
-        self._player_dict = {}
         self._current_player = None
+        self._decision = None
         self._last_player = None
         self._last_actions = None
+        self._history_key = HISTORY_START
         self._debug = False
 
         self.episode_end = False
@@ -136,6 +264,7 @@ class TexasHoldemEnv(Env, utils.EzPickle):
         """
         Reset a cycle
         """
+        self._decision = None
         self._reset_game()
         self._ready_players()
         self._cycle += 1
@@ -156,29 +285,28 @@ class TexasHoldemEnv(Env, utils.EzPickle):
             self._post_smallblind(self._current_player)
             self._current_player = bb = self._get_next_player(players, self._current_player)
             self._post_bigblind(self._current_player)
-            self._current_player = self._get_next_player(players, self._current_player)
-            self._tocall = self._bigblind
+            self._current_player = self._next_to_act(self._current_player)
             self._round = 0
             self.deal_card()
             self._folded_players = []
-            print(self.colored_output(
-                'New Cycle starts. SB: player {}, BB: player {}. BB amount:{}'.format(sb.player_id, bb.player_id,
-                                                                                      self._bigblind), 'magenta'))
-            all_in_players = [p for p in self._seats if p.isallin]
-            if all_in_players:
-                # Player are "forced" to all in
-                self._resolve_sidepots_each_round(self._seats)
+            self._history_key = HISTORY_START
+            if self._listeners:
+                self._emit('cycle_start', {'sb': sb.player_id, 'bb': bb.player_id, 'bigblind': self._bigblind,
+                                           'smallblind': self._smallblind, 'button': self._button,
+                                           'cycle': self._cycle, 'round': self._round,
+                                           'stacks': [p.stack + p.betting for p in self._seats],
+                                           'hands': [p.hand if p.playing_hand else [] for p in self._seats]})
+            if self._betting_closed(players):
+                # players are "forced" to all in by the blinds and nobody is left to act
                 self._two_players_all_in()
-                self.cycle_checkout(self._seats)
-                if [p for p in self._seats if p.stack == 0]:
-                    # A player is forced to all-in ,and he loses in all-in bet.
-                    self.episode_end = True
-                return self._get_current_reset_returns(), True
+                self.cycle_checkout(players)
+                self._check_episode_end()
+                return self._get_current_reset_returns(True), True
 
         else:
             self.episode_end = True
-            return self._get_current_reset_returns(), True
-        return self._get_current_reset_returns(), False
+            return self._get_current_reset_returns(True), True
+        return self._get_current_reset_returns(False), False
 
     def step(self, actions):
         """ Player make actions in a round (t -> t+1)
@@ -207,82 +335,119 @@ class TexasHoldemEnv(Env, utils.EzPickle):
         self._last_actions = actions
 
         alive_players = [p for p in self._seats if p.playing_hand]
-        move = self._current_player.validate_action(self._output_state(self._current_player),
-                                                    actions[self._current_player.player_id])
-
+        table_state = self._decision_state()[0]
+        move = self._current_player.validate_action(table_state, actions[self._current_player.player_id])
+        action = MOVE_TO_ACTION[move[0]]
+        self._history_key = extend_history(self._history_key,
+                                           self.action_abstraction.to_abstract(action, move[1], table_state))
+        # the table changes from here, the next decision state is computed on demand
+        self._decision = None
+        if self._listeners:
+            self._emit('action', {'seat': self._current_player.player_id, 'round': self._round,
+                                  'action': action, 'amount': max(move[1], 0)})
+
+        player = self._current_player
+        changed = [player]
         if move[0] == 'call':
-            self._player_bet(self._current_player, self._tocall - self._current_player.currentbet)
-            next_player = self._get_next_player(alive_players, self._current_player)
-            if self._current_player.isallin or next_player.isallin:
-                # if player calls all-in or after call, the player himself is all-in, deal the cards directly
-                self._resolve_sidepots_each_round(self._seats)
-                self._two_players_all_in()
-                self.cycle_checkout(self._seats)
-                if [p for p in self._seats if p.stack == 0]:
-                    # A player is forced to all-in ,and he loses in all-in bet.
-                    self.episode_end = True
-                return self._get_current_step_returns(True)
-            self._current_player = next_player
+            self._player_bet(player, self._tocall - player.currentbet)
 
         elif move[0] == 'check':
-            self._player_bet(self._current_player, 0)
-            self._current_player = self._get_next_player(alive_players, self._current_player)
+            self._player_bet(player, 0)
 
         elif move[0] == 'raise':
-            self._player_bet(self._current_player, move[1])
+            self._player_bet(player, move[1])
             for p in alive_players:
                 # set other players to "unplayed" in this round
-                if p != self._current_player:
+                if p != player:
                     p.playedthisround = False
-            self._current_player = self._get_next_player(alive_players, self._current_player)
+            changed = alive_players
 
         elif move[0] == 'fold':
-            self._current_player.playing_hand = False
-            folded_player = self._current_player
-            self._current_player = self._get_next_player(alive_players, self._current_player)
-            alive_players.remove(folded_player)
-            self._folded_players.append(folded_player)
-            # For two players, it is the end of cycle
-            self._resolve_sidepots_each_round(alive_players + self._folded_players)
+            # the player leaves the cycle, its bets stay in the pots
+            player.playing_hand = False
+            alive_players.remove(player)
+            self._folded_players.append(player)
+
+        if len(alive_players) == 1:
+            # everybody else folded
+            self._current_player = alive_players[0]
             self.cycle_checkout(alive_players)
             cycle_terminate = True
-
-        if move[0] != 'fold' and self._current_player.playedthisround and len(
-                [p for p in alive_players if not p.isallin]) >= 1:
-            # end of round
-            self.round_checkout(alive_players + self._folded_players)
-
-        if self._round == 4:
-            cycle_terminate = True
+        elif self._betting_closed(alive_players):
+            # nobody can bet anymore: deal the remaining cards directly
+            self._two_players_all_in()
             self.cycle_checkout(alive_players)
+            self._check_episode_end()
+            cycle_terminate = True
+        elif not self._round_over(alive_players):
+            self._current_player = self._next_to_act(player)
+        else:
+            # end of round
+            self.round_checkout(alive_players)
+            if self._round == 4:
+                cycle_terminate = True
+                self.cycle_checkout(alive_players)
 
         if cycle_terminate:
             valid_actions = []
         else:
             valid_actions = self.get_valid_actions(self._current_player)
+        if cycle_terminate or self.round_terminate:
+            # new cards, side pots or hand ranks: refresh every seat
+            changed = None
+
+        return self._get_current_step_returns(cycle_terminate, valid_actions, changed)
+
+    def legal_action_mask(self):
+        """ bool array of the legal actions of the current player, indexed by action_table id """
+        return legal_action_mask(self.get_valid_actions(self._current_player))
+
+    def abstract_action_mask(self):
+        """
+        bool array of the legal abstract actions of the current player: fold, check/call, one raise per pot
+        fraction of `raise_fractions`, all-in (see `holdem.abstraction.ActionAbstraction`)
+        """
+        return self.action_abstraction.mask(*self._decision_state())
 
-        return self._get_current_step_returns(cycle_terminate, valid_actions)
+    def abstract_to_action(self, index):
+        """ concrete ACTION of the current player for abstract action `index` """
+        return self.action_abstraction.to_action(index, self._decision_state()[0])
+
+    def infoset_key(self, bucket):
+        """
+        64-bit information set key of the current player (see `holdem.infoset.infoset_key`): its position from the
+        button, the round, the `bucket` of its cards and the abstract actions of the cycle, hashed as they are played
+        """
+        position = (self._current_player.player_id - self._button) % self.n_seats
+        return infoset_key(position, self._round, bucket, self._history_key)
 
     def get_valid_actions(self, cur_player):
-        table_state = self._output_state(cur_player)
+        """ valid actions of `cur_player`, the dict is shared until the next step() for the current player """
+        if cur_player is self._current_player:
+            return self._decision_state()[1]
+        return self._valid_actions(cur_player, self._output_state(cur_player))
+
+    def _decision_state(self):
+        """ (table state, valid actions) of the current player, computed once per step """
+        if self._decision is None:
+            table_state = self._output_state(self._current_player)
+            self._decision = (table_state, self._valid_actions(self._current_player, table_state))
+        return self._decision
+
+    def _valid_actions(self, cur_player, table_state):
         tocall = min(table_state.get('tocall'), cur_player.stack)
         minraise = table_state.get('minraise')
         maxraise = table_state.get('maxraise')
 
+        # no raise when nobody left can match it (e.g. the other players are all-in), see `_output_state`
         if tocall == 0:
-            if self._last_player and self._last_player.isallin:
-                #  opponent is all-in
-                return {'fold': False, 'check': False, 'call': True, 'raise': False, 'call_amount': tocall}
             if maxraise - minraise >= 0:
                 return {'fold': False, 'check': True, 'call': False, 'raise': True, 'raise_range': [minraise, maxraise]}
             else:
                 return {'fold': False, 'check': True, 'call': False, 'raise': False}
         else:
             # to_call>0
-            if self._last_player and self._last_player.isallin:
-                #  opponent is all-in
-                return {'fold': True, 'check': False, 'call': True, 'raise': False, 'call_amount': tocall}
-            elif maxraise - minraise >= 0:
+            if maxraise - minraise >= 0:
                 return {'fold': True, 'check': False, 'call': True, 'raise': True, 'call_amount': tocall,
                         'raise_range': [minraise, maxraise]}
             else:
@@ -299,6 +464,8 @@ class TexasHoldemEnv(Env, utils.EzPickle):
                       self._totalpot))
 
     def render(self, mode='machine', close=False, cur_episode=-1000):
+        if self.headless:
+            return
 
         self.print_round_info(cur_episode)
         if self._last_actions is not None:
@@ -318,20 +485,18 @@ class TexasHoldemEnv(Env, utils.EzPickle):
         print("")
 
     def _two_players_all_in(self):
-        self._resolve_sidepots_each_round(self._seats)
+        """ deal the remaining community cards, when no more bet can be made """
         while len(self.community) < 5:
             self._discard.append(self._deck.draw(1))
             self.community.append(self._deck.draw(1))
+            if self._listeners:
+                self._emit('board', {'round': self._round, 'cards': self.community[-1:]})
 
     def round_checkout(self, players):
         """
         End the round and start a new round
         """
-        # resolve sidepot
-        self._resolve_sidepots_each_round(players + self._folded_players)
-
-        # Start a new round
-        self._current_player = self._first_to_act(players)
+        self._current_player = self._first_to_act([p for p in players if not p.isallin])
         self._new_round_env()
         self.deal_card()
         self.round_terminate = True
@@ -402,14 +567,20 @@ class TexasHoldemEnv(Env, utils.EzPickle):
     def _flop(self):
         self._discard.append(self._deck.draw(1))
         self.community = self._deck.draw(3)
+        if self._listeners:
+            self._emit('board', {'round': self._round, 'cards': self.community[:]})
 
     def _turn(self):
         self._discard.append(self._deck.draw(1))
         self.community.append(self._deck.draw(1))
+        if self._listeners:
+            self._emit('board', {'round': self._round, 'cards': self.community[-1:]})
 
     def _river(self):
         self._discard.append(self._deck.draw(1))
         self.community.append(self._deck.draw(1))
+        if self._listeners:
+            self._emit('board', {'round': self._round, 'cards': self.community[-1:]})
 
     def _ready_players(self):
         for p in self._seats:
@@ -418,34 +589,41 @@ class TexasHoldemEnv(Env, utils.EzPickle):
                 p.sitting_out = False
                 p.playing_hand = True
 
-    def _resolve_sidepots_each_round(self, players_playing):
-        players = [p for p in players_playing if p.currentbet]
-        if self._debug:
-            print('[DEBUG] current bets: ', [p.currentbet for p in players])
-            print('[DEBUG] playing hand: ', [p.playing_hand for p in players])
-        if not players:
-            return
-        try:
-            smallest_bet = min([p.currentbet for p in players if p.playing_hand])
-        except ValueError:
-            for p in players:
-                self._side_pots[self._current_sidepot] += p.currentbet
-                p.currentbet = 0
-            return
-
-        smallest_players_allin = [p for p, bet in zip(players, [p.currentbet for p in players]) if
-                                  bet == smallest_bet and p.isallin]
-
-        for p in players:
-            self._side_pots[self._current_sidepot] += min(smallest_bet, p.currentbet)
-            p.currentbet -= min(smallest_bet, p.currentbet)
-            p.lastsidepot = self._current_sidepot
-
-        if smallest_players_allin:
-            self._current_sidepot += 1
-            self._resolve_sidepots_each_round(players)
-        if self._debug:
-            print('[DEBUG] sidepots: ', self._side_pots)
+    def _layered_pots(self, players):
+        """
+        Main pot then side pots, as [amount, eligible players] in one pass over the cycle bets sorted by size:
+        the chips between two bet levels go to a pot that the `players` (still in the hand) who bet up to
+        the upper level can win. The chips of a level nobody can win (bet by folded players only) join the
+        pot below, a pot with the same players as the previous one is merged into it.
+        """
+        bets = sorted([p for p in self._seats if p.betting], key=lambda p: p.betting)
+        in_hand = set(players)
+        pots = []
+        level = 0
+        carry = 0
+        for i, p in enumerate(bets):
+            if p.betting == level:
+                continue
+            amount = (p.betting - level) * (len(bets) - i) + carry
+            level = p.betting
+            eligible = [q for q in bets[i:] if q in in_hand]
+            if not eligible:
+                if pots:
+                    pots[-1][0] += amount
+                    carry = 0
+                else:
+                    carry = amount
+            elif pots and len(eligible) == len(pots[-1][1]):
+                pots[-1][0] += amount
+            else:
+                pots.append([amount, eligible])
+        for p in bets:
+            p.lastsidepot = 0
+        for pot_idx, (_, eligible) in enumerate(pots):
+            for p in eligible:
+                p.lastsidepot = pot_idx
+        self._side_pots = [amount for amount, _ in pots]
+        return pots
 
     def _new_round_env(self):
         for player in self._player_dict.values():
@@ -460,37 +638,80 @@ class TexasHoldemEnv(Env, utils.EzPickle):
         # print(colored("New round starts.", 'magenta'))
 
     def cycle_checkout(self, players):
+        """ pay the pots to `players`, the players still in the hand """
+        pots = self._layered_pots(players)
         if len(players) == 1:
             # winning player get the refund
-            players[0].refund(sum(self._side_pots))
+            amount = sum(self._side_pots)
+            players[0].refund(amount)
+            if self._listeners:
+                self._emit('pot', {'seat': players[0].player_id, 'round': self._round, 'amount': amount})
             self._totalpot = 0
+            return
+
+        self._rank_hands(players)
+        # compute who wins each side pot and pay winners
+        for amount, pot_contributors in pots:
+            winning_rank = min([p.handrank for p in pot_contributors])
+            winning_players = [p for p in pot_contributors if p.handrank == winning_rank]
+            # a pot of one player is an uncalled bet returned to it, nobody won it
+            if self._listeners and len(pot_contributors) > 1:
+                self._emit('cycle_winner', {'player_id': winning_players[0].player_id})
+            split_amount = amount // len(winning_players)
+            for player in winning_players:
+                if self._debug:
+                    print('[DEBUG] Player', player.player_id, 'wins side pot (', split_amount, ')')
+                player.refund(split_amount)
+                if self._listeners:
+                    self._emit('pot', {'seat': player.player_id, 'round': self._round, 'amount': split_amount})
+
+            # any remaining chips after splitting go to the winner in the earliest position
+            remainder = amount - split_amount * len(winning_players)
+            if remainder:
+                earliest = self._first_to_act(sorted(winning_players, key=lambda p: p.get_seat()))
+                earliest.refund(remainder)
+                if self._listeners:
+                    self._emit('pot', {'seat': earliest.player_id, 'round': self._round, 'amount': remainder})
+
+    def _rank_hands(self, players):
+        """
+        set the hand rank of the players at showdown: multi-way in one `evaluate_many` call when the evaluator has
+        it (e.g. a NumpyEvaluator, not the default treys one), heads-up two `evaluate` calls are cheaper
+        """
+        evaluate_many = getattr(self._evaluator, 'evaluate_many', None)
+        if evaluate_many is not None and len(players) > 2:
+            ranks = evaluate_many([p.hand for p in players], [self.community] * len(players))
+            for player, rank in zip(players, ranks.tolist()):
+                player.handrank = rank
         else:
-            # compute hand ranks
             for player in players:
                 player.handrank = self._evaluator.evaluate(player.hand, self.community)
 
-            # trim side_pots to only include the non-empty side pots
-            temp_pots = [pot for pot in self._side_pots if pot > 0]
-
-            # compute who wins each side pot and pay winners
-            for pot_idx, _ in enumerate(temp_pots):
-                # find players involved in given side pot, compute the winner(s)
-                pot_contributors = [p for p in players if p.lastsidepot >= pot_idx]
-                winning_rank = min([p.handrank for p in pot_contributors])
-                winning_players = [p for p in pot_contributors if p.handrank == winning_rank]
-                print(self.colored_output("Cycle winner: {}".format(winning_players[0].player_id), 'magenta'))
-                for player in winning_players:
-                    split_amount = int(self._side_pots[pot_idx] / len(winning_players))
-                    if self._debug:
-                        print('[DEBUG] Player', player.player_id, 'wins side pot (',
-                              int(self._side_pots[pot_idx] / len(winning_players)), ')')
-                    player.refund(split_amount)
-                    self._side_pots[pot_idx] -= split_amount
-
-                # any remaining chips after splitting go to the winner in the earliest position
-                if self._side_pots[pot_idx]:
-                    earliest = self._first_to_act([player for player in winning_players])
-                    earliest.refund(self._side_pots[pot_idx])
+    def _round_over(self, players):
+        """ every player of the hand who can still bet has acted and matched the highest bet """
+        tocall = self._tocall
+        return all(p.playedthisround and p.currentbet == tocall for p in players if not p.isallin)
+
+    def _betting_closed(self, players):
+        """ every player of the hand is all-in, but at most one who has matched the highest bet """
+        actors = [p for p in players if not p.isallin]
+        return not actors or (len(actors) == 1 and actors[0].currentbet >= self._tocall)
+
+    def _next_to_act(self, current_player):
+        """ next player in seat order after `current_player` who can still bet and has not matched the round yet """
+        idx = self._seats.index(current_player)
+        tocall = self._tocall
+        for i in range(1, len(self._seats) + 1):
+            p = self._seats[(idx + i) % len(self._seats)]
+            if p.playing_hand and not p.isallin and not (p.playedthisround and p.currentbet == tocall):
+                return p
+        return None
+
+    def _check_episode_end(self):
+        """ after an all-in, end the episode when the next reset() would not start a cycle """
+        alive_player = sum([1 if p.stack > 0 else 0 for p in self._seats])
+        if not alive_player > len(self._seats) // 2:
+            self.episode_end = True
 
     def _reset_game(self):
         playing = 0
@@ -499,7 +720,7 @@ class TexasHoldemEnv(Env, utils.EzPickle):
                 player.reset_hand()
                 playing += 1
         self.community = []
-        self._current_sidepot = 0
+        self._discard = []
         self._totalpot = 0
         self._side_pots = [0] * len(self._seats)
         self._deck.shuffle()
@@ -510,9 +731,10 @@ class TexasHoldemEnv(Env, utils.EzPickle):
                 self._button = (self._button + 1) % len(self._seats)
 
     def _output_state(self, current_player):
-        next_player = self._get_next_player(self._seats, self._current_player)
+        """ table state of a player, as validated by `Player.validate_action` """
+        # no raise above what the other players still betting can match
+        others = [p.stack for p in self._seats if p.playing_hand and not p.isallin and p is not current_player]
         return {
-            'players': [player.player_state() for player in self._seats],
             'community': self.community,
             'my_seat': current_player.get_seat(),
             'pocket_cards': current_player.hand,
@@ -524,7 +746,7 @@ class TexasHoldemEnv(Env, utils.EzPickle):
             'player_id': current_player.player_id,
             'lastraise': self._lastraise,
             'minraise': max(self._bigblind, self._lastraise + self._tocall),
-            "maxraise": min(current_player.stack, next_player.stack)
+            "maxraise": min(current_player.stack, max(others) if others else 0)
 
         }
 
@@ -563,11 +785,34 @@ class TexasHoldemEnv(Env, utils.EzPickle):
         )
         return STATE(tuple(player_states), community_states, self._pad(self.community, 5, -1))
 
-    def _get_current_reset_returns(self):
-        return self._get_current_state()
-
-    def _get_current_step_returns(self, terminal, valid_actions=[]):
-        obs = self._get_current_state()
+    def _get_observation(self, valid_actions, changed=None):
+        """ observation in `obs_mode`, the array observations are only rewritten for the `changed` players """
+        if self._array_obs is None:
+            return self._get_current_state()
+        obs = self._array_obs
+        obs.write_legal(valid_actions)
+        self.action_abstraction.mask(self._decision_state()[0] if valid_actions else None, valid_actions,
+                                     obs.abstract_legal)
+        if changed is None:
+            for seat, player in enumerate(self._seats):
+                obs.write_player(seat, player)
+            obs.write_cards(self._seats, self.community)
+        else:
+            for player in changed:
+                obs.write_player(player.get_seat(), player)
+        current = self._current_player
+        obs.write_community(self._button, self._smallblind, self._bigblind, self._totalpot, self._lastraise,
+                            self._roundpot, self._tocall - current.currentbet if current else 0,
+                            current.player_id if current else -1)
+        return obs.flat if self.obs_mode == 'array' else obs.blocks
+
+    def _get_current_reset_returns(self, terminal):
+        if terminal or self._array_obs is None:
+            return self._get_observation([])
+        return self._get_observation(self.get_valid_actions(self._current_player))
+
+    def _get_current_step_returns(self, terminal, valid_actions=[], changed=None):
+        obs = self._get_observation(valid_actions, changed)
         rew = [player.stack for player in self._seats]
         return obs, rew, terminal, valid_actions
 
@@ -0,0 +1,146 @@
+import math
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from treys.lookup import LookupTable
+
+from .deck import FULL_DECK, card_index, card_indices
+from .evaluator import get_numpy_evaluator
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+PREFLOP_169_PATH = os.path.join(DATA_DIR, 'preflop_equity_169.npy')
+PREFLOP_1326_PATH = os.path.join(DATA_DIR, 'preflop_equity_1326.npy')
+
+# COMBO_INDEX[i, j]: index (0..1325) of the 2 card combo of card indices i != j, -1 on the diagonal
+COMBO_INDEX = np.full((52, 52), -1, dtype=np.int16)
+_i, _j = np.triu_indices(52, k=1)
+COMBO_INDEX[_i, _j] = COMBO_INDEX[_j, _i] = np.arange(len(_i))
+# card indices of every combo
+COMBO_CARDS = np.stack([_i, _j], axis=1)
+
+'''
+Heads-up preflop equity (win + tie / 2 against one random hand, the 5 board cards dealt at random):
+PREFLOP_EQUITY_169, (13, 13) float32, by rank (0: deuce ... 12: ace), [high, low] for suited hands,
+                    [low, high] for offsuit hands, pairs on the diagonal
+PREFLOP_EQUITY_1326, (1326,) float32, by COMBO_INDEX
+Both are built by scripts/build_preflop_equity.py and memory-mapped at import.
+'''
+if os.path.exists(PREFLOP_169_PATH) and os.path.exists(PREFLOP_1326_PATH):
+    PREFLOP_EQUITY_169 = np.load(PREFLOP_169_PATH, mmap_mode='r')
+    PREFLOP_EQUITY_1326 = np.load(PREFLOP_1326_PATH, mmap_mode='r')
+else:
+    PREFLOP_EQUITY_169 = PREFLOP_EQUITY_1326 = None
+
+
+def hand_class(hand):
+    """ (row, column) of a 2 card hand (treys cards) in PREFLOP_EQUITY_169 """
+    a, b = card_index(hand[0]), card_index(hand[1])
+    high, low = max(a >> 2, b >> 2), min(a >> 2, b >> 2)
+    if (a & 3) == (b & 3):
+        return high, low
+    return low, high
+
+
+def preflop_equity(hand):
+    """ heads-up preflop equity of a 2 card hand (treys cards) """
+    return float(PREFLOP_EQUITY_1326[COMBO_INDEX[card_index(hand[0]), card_index(hand[1])]])
+
+
+def preflop_equity_many(hands):
+    """ preflop_equity of an int array (N, 2) of treys cards """
+    idx = card_indices(hands)
+    return PREFLOP_EQUITY_1326[COMBO_INDEX[idx[:, 0], idx[:, 1]]]
+
+
+def compute_preflop_equity(evaluator, n_samples, rng, batch=100000):
+    """
+    Monte Carlo estimate of the (13, 13) class table, `n_samples` opponent hands and boards per class
+    (equity only depends on the class against a random hand), and of the 1326 combo table derived from it.
+    """
+    table = np.zeros((13, 13), dtype=np.float64)
+    for row in range(13):
+        for col in range(13):
+            high, low = max(row, col), min(row, col)
+            # a representative hand of the class: suited above the diagonal
+            hero = [4 * high, 4 * low + (0 if row > col else 1)]
+            rest = np.setdiff1d(np.arange(52), hero)
+            hero_cards = np.broadcast_to(FULL_DECK[hero], (batch, 2))
+            score = 0.0
+            for start in range(0, n_samples, batch):
+                n = min(batch, n_samples - start)
+                drawn = FULL_DECK[rest[rng.random((n, len(rest))).argsort(axis=1)[:, :7]]]
+                board = drawn[:, 2:]
+                mine = evaluator.evaluate_many(hero_cards[:n], board)
+                theirs = evaluator.evaluate_many(drawn[:, :2], board)
+                score += (mine < theirs).sum() + 0.5 * (mine == theirs).sum()
+            table[row, col] = score / n_samples
+    combos = np.empty(len(COMBO_CARDS), dtype=np.float64)
+    for k, (a, b) in enumerate(COMBO_CARDS):
+        combos[k] = table[hand_class([int(FULL_DECK[a]), int(FULL_DECK[b])])]
+    return table.astype(np.float32), combos.astype(np.float32)
+
+
+EQUITY_ESTIMATE = namedtuple('equity_estimate', ['equity', 'ci95', 'samples', 'elapsed'])
+'''
+equity, (number), win + tie share against the opponents
+ci95, (number), half width of the 95% confidence interval of `equity`
+samples, (number), number of sampled opponent hands + boards
+elapsed, (number), seconds spent
+'''
+
+
+def estimate_equity(hand, community, n_opponents=1, ci_width=0.01, batch=2048, max_samples=200000,
+                    time_limit=None, rng=None, evaluator=None):
+    """
+    Monte Carlo equity of `hand` against `n_opponents` random hands, with the missing community cards at random.
+    Opponent hands and boards are sampled (without the known cards) and ranked `batch` at a time, sampling stops
+    when the 95% confidence interval is narrower than `ci_width`, after `max_samples` samples or after
+    `time_limit` seconds.
+        @param: hand, 2 treys cards
+        @param: community, 0 to 5 treys cards (-1 entries are ignored)
+    """
+    start = time.perf_counter()
+    rng = rng if rng is not None else np.random.default_rng()
+    evaluator = evaluator if evaluator is not None else get_numpy_evaluator()
+    community = [c for c in community if c != -1]
+    known = [card_index(c) for c in list(hand) + community]
+    rest = np.setdiff1d(np.arange(52), known)
+    n_board = 5 - len(community)
+    need = 2 * n_opponents + n_board
+    hero = np.broadcast_to(np.asarray(hand, dtype=np.int64), (batch, 2))
+    board = np.empty((batch, 5), dtype=np.int64)
+    board[:, :len(community)] = community
+
+    samples, total, total_sq = 0, 0.0, 0.0
+    half = float('inf')
+    while True:
+        drawn = FULL_DECK[rest[rng.random((batch, len(rest))).argsort(axis=1)[:, :need]]]
+        board[:, len(community):] = drawn[:, :n_board]
+        mine = evaluator.evaluate_many(hero, board)
+        best = np.full(batch, LookupTable.MAX_HIGH_CARD + 1, dtype=np.int64)
+        tied = np.zeros(batch, dtype=np.int64)
+        for k in range(n_opponents):
+            theirs = evaluator.evaluate_many(drawn[:, n_board + 2 * k:n_board + 2 * k + 2], board)
+            tied = np.where(theirs < best, 0, tied) + (theirs == mine)
+            best = np.minimum(best, theirs)
+        score = np.where(mine < best, 1.0, np.where(mine == best, 1.0 / (1 + tied), 0.0))
+        samples += batch
+        total += score.sum()
+        total_sq += (score * score).sum()
+        mean = total / samples
+        half = 1.96 * math.sqrt(max(total_sq / samples - mean * mean, 0.0) / samples)
+        if 2 * half <= ci_width or samples >= max_samples:
+            break
+        if time_limit is not None and time.perf_counter() - start >= time_limit:
+            break
+    return EQUITY_ESTIMATE(float(mean), half, samples, time.perf_counter() - start)
+
+
+def estimate_state_equity(state, playerid, **kwargs):
+    """ estimate_equity of a player from a STATE, against the other players still in the hand """
+    n_opponents = sum(1 for p in state.player_states if p.playing_hand and p.seat != playerid)
+    return estimate_equity(state.player_states[playerid].hand, state.community_card,
+                           n_opponents=max(n_opponents, 1), **kwargs)
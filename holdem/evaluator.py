@@ -0,0 +1,190 @@
+import itertools
+import os
+
+import numpy as np
+
+from treys.card import Card
+from treys.evaluator import Evaluator
+from treys.lookup import LookupTable
+
+from .deck import SUIT_INDEX
+
+# NumpyEvaluator tables shipped with the package (see scripts/build_evaluator_tables.py)
+NUMPY_TABLES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'numpy_evaluator.npy')
+
+# set it to a file path to load (or create on first use) the lookup table cache
+CACHE_ENV_VAR = 'HOLDEM_EVALUATOR_CACHE'
+# same, for the NumpyEvaluator tables
+NUMPY_CACHE_ENV_VAR = 'HOLDEM_NUMPY_EVALUATOR_CACHE'
+
+# process-wide evaluators, by cache path (None without cache)
+_shared_evaluators = {}
+_shared_numpy_evaluators = {}
+
+
+def get_evaluator(cache_path=None):
+    """
+    Return the process-wide treys Evaluator, its lookup tables are built on the first call only.
+    When `cache_path` (or the HOLDEM_EVALUATOR_CACHE environment variable) is given, the tables
+    are loaded from that file, and the file is written if it does not exist yet. There is one
+    evaluator per cache path.
+    """
+    if cache_path is None:
+        cache_path = os.environ.get(CACHE_ENV_VAR) or None
+    evaluator = _shared_evaluators.get(cache_path)
+    if evaluator is None:
+        if cache_path and os.path.exists(cache_path):
+            evaluator = load_evaluator(cache_path)
+        else:
+            evaluator = Evaluator()
+            if cache_path:
+                save_evaluator(evaluator, cache_path)
+        _shared_evaluators[cache_path] = evaluator
+    return evaluator
+
+
+def get_numpy_evaluator(cache_path=None):
+    """
+    Return the process-wide NumpyEvaluator, its tables are memory mapped from the file shipped in holdem/data
+    (NUMPY_TABLES_PATH) on the first call. `cache_path` (or HOLDEM_NUMPY_EVALUATOR_CACHE) replaces that file,
+    it works like for `get_evaluator`.
+    """
+    if cache_path is None:
+        cache_path = os.environ.get(NUMPY_CACHE_ENV_VAR) or None
+    evaluator = _shared_numpy_evaluators.get(cache_path)
+    if evaluator is None:
+        evaluator = _shared_numpy_evaluators[cache_path] = NumpyEvaluator(cache_path)
+    return evaluator
+
+
+def _prime_product(ranks):
+    product = 1
+    for r in ranks:
+        product *= Card.PRIMES[r]
+    return product
+
+
+def save_evaluator(evaluator, path):
+    """ dump the lookup tables as a (n, 3) int64 array of [is_flush, prime product, rank] rows """
+    table = evaluator.table
+    rows = [(1, prime, rank) for prime, rank in table.flush_lookup.items()]
+    rows += [(0, prime, rank) for prime, rank in table.unsuited_lookup.items()]
+    with open(path, 'wb') as f:
+        np.save(f, np.array(rows, dtype=np.int64))
+
+
+def load_evaluator(path):
+    """
+    build an Evaluator from a cache file written by `save_evaluator`, without computing the tables:
+    treys looks the ranks up in dicts, the rows are copied into dicts of the process
+    """
+    rows = np.load(path)
+    is_flush = rows[:, 0] == 1
+    table = object.__new__(LookupTable)
+    table.flush_lookup = dict(zip(rows[is_flush, 1].tolist(), rows[is_flush, 2].tolist()))
+    table.unsuited_lookup = dict(zip(rows[~is_flush, 1].tolist(), rows[~is_flush, 2].tolist()))
+
+    evaluator = object.__new__(Evaluator)
+    evaluator.table = table
+    evaluator.hand_size_map = {
+        5: evaluator._five,
+        6: evaluator._six,
+        7: evaluator._seven
+    }
+    return evaluator
+
+
+class NumpyEvaluator(object):
+    """
+    Hand evaluator giving the same ranks as treys (1 = royal flush ... 7462 = worst high card),
+    with the rank tables stored as NumPy arrays so that many hands are ranked at once.
+
+    5, 6 and 7 card hands are ranked with a single lookup instead of trying every 5 card combination:
+    + flushes: with at most 7 cards a flush excludes quads and full houses, so the rank is a direct
+      index by the 13 bit rank mask of the flush suit.
+    + other hands: the product of the card primes identifies the rank multiset, it is searched in a
+      sorted table of every 5, 6 and 7 card multiset.
+    """
+
+    def __init__(self, cache_path=None):
+        if cache_path is None and os.path.exists(NUMPY_TABLES_PATH):
+            cache_path = NUMPY_TABLES_PATH
+        if cache_path and os.path.exists(cache_path):
+            tables = np.load(cache_path, mmap_mode='r')
+        else:
+            tables = self._build_tables(get_evaluator())
+            if cache_path:
+                with open(cache_path, 'wb') as f:
+                    np.save(f, tables)
+        # `evaluate_many` reads these arrays, memory mapped from the table file
+        self.flush_table = tables[:8192, 1]
+        self.primes = tables[8192:, 0]
+        self.ranks = tables[8192:, 1]
+
+    def evaluate(self, hand, board):
+        """ treys compatible: rank of one hand, both are lists of treys cards """
+        # plain python copies (per process) of the tables for the one hand path, made on the first call
+        self._flush_list = self.flush_table.tolist()
+        self._unsuited_dict = dict(zip(self.primes.tolist(), self.ranks.tolist()))
+        self.evaluate = self._evaluate
+        return self._evaluate(hand, board)
+
+    def _evaluate(self, hand, board):
+        cards = hand + board
+        product = 1
+        suits = [0, 0, 0, 0]
+        rankbits = [0, 0, 0, 0]
+        for c in cards:
+            product *= c & 0xFF
+            s = SUIT_INDEX[(c >> 12) & 0xF]
+            suits[s] += 1
+            rankbits[s] |= c >> 16
+        for s in range(4):
+            if suits[s] >= 5:
+                return self._flush_list[rankbits[s]]
+        return self._unsuited_dict[product]
+
+    def evaluate_many(self, hands, boards):
+        """
+        Rank many hands at once.
+            @param: hands, int array (N, 2) of treys cards
+            @param: boards, int array (N, 3 to 5) of treys cards
+            @return: ranks, int array (N,)
+        """
+        cards = np.concatenate([np.asarray(hands, dtype=np.int64), np.asarray(boards, dtype=np.int64)], axis=1)
+        product = np.prod(cards & 0xFF, axis=1)
+        ranks = self.ranks[np.searchsorted(self.primes, product)]
+        suitbits = (cards >> 12) & 0xF
+        rankbits = cards >> 16
+        for bit in (1, 2, 4, 8):
+            suited = suitbits == bit
+            flush = suited.sum(axis=1) >= 5
+            if flush.any():
+                bits = np.bitwise_or.reduce(np.where(suited[flush], rankbits[flush], 0), axis=1)
+                ranks[flush] = self.flush_table[bits]
+        return ranks
+
+    @staticmethod
+    def _build_tables(evaluator):
+        """
+        Rows 0..8191: [rank mask, best flush rank] (0 when less than 5 bits),
+        next rows: [prime product, best rank] of every 5 to 7 card multiset, sorted by product.
+        """
+        table = evaluator.table
+        flush = np.zeros((8192, 2), dtype=np.int64)
+        flush[:, 0] = np.arange(8192)
+        for bits in range(8192):
+            ranks = [r for r in range(13) if bits >> r & 1]
+            if 5 <= len(ranks) <= 7:
+                flush[bits, 1] = min(table.flush_lookup[Card.prime_product_from_rankbits(sum(1 << r for r in c))]
+                                     for c in itertools.combinations(ranks, 5))
+
+        unsuited = {}
+        for n in (5, 6, 7):
+            for ranks in itertools.combinations_with_replacement(range(13), n):
+                if max(ranks.count(r) for r in set(ranks)) > 4:
+                    continue
+                unsuited[_prime_product(ranks)] = min(table.unsuited_lookup[_prime_product(c)]
+                                                      for c in set(itertools.combinations(ranks, 5)))
+        multisets = np.array(sorted(unsuited.items()), dtype=np.int64)
+        return np.concatenate([flush, multisets])
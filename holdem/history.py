@@ -0,0 +1,122 @@
+import glob
+import os
+
+import numpy as np
+
+
+class history_event():
+    CYCLE_START = 0
+    STACK = 1
+    HOLE_CARDS = 2
+    BOARD = 3
+    ACTION = 4
+    POT = 5
+
+
+RECORD_DTYPE = np.dtype([
+    ('hand_id', '<u8'),
+    ('event', 'u1'),
+    ('round', 'u1'),
+    ('seat', 'i1'),
+    ('action', 'i1'),
+    ('amount', '<i8'),
+    ('cards', '<i4', (3,)),
+])
+'''
+One fixed-width record per game event, every record of a cycle has the same hand_id:
+CYCLE_START, seat: button, amount: big blind, cards: [small blind, sb seat, bb seat]
+STACK,       seat, amount: stack before the blinds (one record per seat)
+HOLE_CARDS,  seat, cards[:2]: pocket cards (one record per playing seat)
+BOARD,       round, cards: community cards just dealt (3 on the flop, 1 after), -1 padded
+ACTION,      round, seat, action: action_table id, amount: raise/call amount
+POT,         round, seat, amount: chips won
+'''
+
+
+class HandHistoryWriter(object):
+    """
+    Record the hands played by a TexasHoldemEnv into binary files of RECORD_DTYPE records.
+
+        writer = HandHistoryWriter('log/history')
+        env.add_listener(writer)
+        ...
+        writer.close()
+
+    Records are buffered and written in bulk, a new file `<prefix>.<n>.hh` is started at the first
+    cycle after the current one holds `max_records` records, so every file holds whole cycles.
+    """
+
+    def __init__(self, prefix, buffer_size=65536, max_records=1 << 24):
+        self.prefix = prefix
+        self.buffer_size = buffer_size
+        self.max_records = max_records
+        self.hand_id = -1
+        self._buffer = []
+        self._file = None
+        self._file_index = -1
+        self._file_records = 0
+
+    def __call__(self, event, info):
+        if event == 'action':
+            self._buffer.append((self.hand_id, history_event.ACTION, info['round'], info['seat'], info['action'],
+                                 info['amount'], (-1, -1, -1)))
+        elif event == 'board':
+            cards = info['cards']
+            self._buffer.append((self.hand_id, history_event.BOARD, info['round'], -1, -1, 0,
+                                 tuple(cards) + (-1,) * (3 - len(cards))))
+        elif event == 'pot':
+            self._buffer.append((self.hand_id, history_event.POT, info['round'], info['seat'], -1,
+                                 info['amount'], (-1, -1, -1)))
+        elif event == 'cycle_start':
+            if self._file_records + len(self._buffer) >= self.max_records:
+                self.flush()
+                self._rotate()
+            self.hand_id += 1
+            hand_id = self.hand_id
+            buf = self._buffer
+            buf.append((hand_id, history_event.CYCLE_START, info['round'], info['button'], -1,
+                        info['bigblind'], (info['smallblind'], info['sb'], info['bb'])))
+            for seat, stack in enumerate(info['stacks']):
+                buf.append((hand_id, history_event.STACK, 0, seat, -1, stack, (-1, -1, -1)))
+            for seat, hand in enumerate(info['hands']):
+                if hand:
+                    buf.append((hand_id, history_event.HOLE_CARDS, 0, seat, -1, 0, (hand[0], hand[1], -1)))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """ write the buffered records """
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._rotate()
+        records = np.array(self._buffer, dtype=RECORD_DTYPE)
+        self._buffer = []
+        records.tofile(self._file)
+        self._file.flush()
+        self._file_records += len(records)
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        self._file_index += 1
+        self._file = open('{}.{:05d}.hh'.format(self.prefix, self._file_index), 'wb')
+        self._file_records = 0
+
+
+def history_files(prefix):
+    """ files written by a HandHistoryWriter with this prefix, in writing order """
+    return sorted(glob.glob(glob.escape(prefix) + '.[0-9][0-9][0-9][0-9][0-9].hh'))
+
+
+def read_history(path):
+    """ memory-map a history file as a RECORD_DTYPE array """
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r')
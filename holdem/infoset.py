@@ -0,0 +1,241 @@
+import json
+import os
+import struct
+from collections import OrderedDict
+
+import numpy as np
+
+from gym import error
+
+# 64-bit FNV-1a
+HISTORY_START = 0xcbf29ce484222325
+_FNV_PRIME = 0x100000001b3
+_MASK64 = (1 << 64) - 1
+
+
+def extend_history(history_key, index):
+    """ key of a betting history extended by abstract action `index` """
+    return ((history_key ^ (index + 1)) * _FNV_PRIME) & _MASK64
+
+
+def history_key(actions):
+    """ key of a sequence of abstract actions, as built by `extend_history` from HISTORY_START """
+    key = HISTORY_START
+    for index in actions:
+        key = ((key ^ (index + 1)) * _FNV_PRIME) & _MASK64
+    return key
+
+
+def infoset_key(position, round, bucket, history_key):
+    """
+    64-bit key of an information set: the player position from the button (< 16), the betting round (< 8), the bucket
+    of its cards and the key of the abstract actions played in the cycle so far, hashed in one FNV-1a step
+    """
+    return ((history_key ^ (position | round << 4 | bucket << 7)) * _FNV_PRIME) & _MASK64 or 1
+
+
+class StrategyStore(object):
+    """
+    Strategy table by information set key, larger than memory if needed: the recently used rows are kept in memory
+    (at most `capacity`, least recently used first out), every row lives in an open addressing hash table memory
+    mapped from `path` (a .npy file of (key, strategy) records, key 0 marks an empty slot).
+    Rows written in memory reach the file when they leave the memory or at `flush()`. `meta` is a dict saved next
+    to the file (`path` + '.json'), e.g. the abstraction the strategy was computed with.
+        @param: mode, 'a' to open or create the file, 'w' to create it, 'r' read only
+    """
+
+    def __init__(self, path, n_actions=None, capacity=65536, slots=1 << 16, mode='a'):
+        if mode not in ('a', 'w', 'r'):
+            raise error.Error("mode must be 'a', 'w' or 'r'")
+        self.path = path
+        self.capacity = capacity
+        self.readonly = mode == 'r'
+        if mode == 'w' or (mode == 'a' and not os.path.exists(path)):
+            if n_actions is None:
+                raise error.Error('n_actions is needed to create a strategy store')
+            self._open(np.lib.format.open_memmap(path, mode='w+', dtype=self._dtype(n_actions),
+                                                 shape=(_power_of_two(slots),)))
+        else:
+            self._open(np.load(path, mmap_mode='r' if self.readonly else 'r+'))
+            if n_actions is not None and n_actions != self.n_actions:
+                raise error.Error('{} stores {} actions, not {}'.format(path, self.n_actions, n_actions))
+        self._cache = OrderedDict()
+        self._dirty = set()
+        self.meta = {}
+        if os.path.exists(path + '.json'):
+            with open(path + '.json') as f:
+                self.meta = json.load(f)
+
+    @staticmethod
+    def _dtype(n_actions):
+        return np.dtype([('key', '<u8'), ('strategy', '<f4', (n_actions,))])
+
+    def _open(self, table):
+        self._table = table
+        # plain ndarray views: indexing a memmap builds memmap objects
+        self._keys = np.asarray(table['key'])
+        self._strategy = np.asarray(table['strategy'])
+        self.n_actions = self._strategy.shape[1]
+        self._mask = len(table) - 1
+        # raw records, to read a row without NumPy objects (see `peek`)
+        self._record = struct.Struct('<Q{}f'.format(self.n_actions))
+        self._buffer = memoryview(table).cast('B')
+        self._count = int(np.count_nonzero(self._keys))
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        return key in self._cache or self._find(key) >= 0
+
+    def _find(self, key):
+        """ slot of `key` in the file, -1 when absent """
+        keys, mask = self._keys, self._mask
+        slot = key & mask
+        while True:
+            k = keys.item(slot)
+            if k == key:
+                return slot
+            if k == 0:
+                return -1
+            slot = (slot + 1) & mask
+
+    def get(self, key, default=None):
+        """ strategy row of `key` (float32, do not modify it in place), `default` when absent """
+        cache = self._cache
+        values = cache.get(key)
+        if values is not None:
+            cache.move_to_end(key)
+            return values
+        slot = self._find(key)
+        if slot < 0:
+            return default
+        values = cache[key] = self._strategy[slot].copy()
+        if len(cache) > self.capacity:
+            self._evict()
+        return values
+
+    def peek(self, key):
+        """
+        strategy of `key` as a tuple of floats, None when absent: the per decision lookup of read only stores,
+        read in the file without caching it (writable stores first look at the rows not flushed yet)
+        """
+        if not self.readonly:
+            values = self._cache.get(key)
+            if values is not None:
+                return tuple(values.tolist())
+        record, buffer, mask = self._record, self._buffer, self._mask
+        size = record.size
+        slot = key & mask
+        while True:
+            values = record.unpack_from(buffer, slot * size)
+            if values[0] == key:
+                return values[1:]
+            if not values[0]:
+                return None
+            slot = (slot + 1) & mask
+
+    def __getitem__(self, key):
+        values = self.get(key)
+        if values is None:
+            raise KeyError(key)
+        return values
+
+    def __setitem__(self, key, values):
+        if self.readonly:
+            raise error.Error('{} is opened read only'.format(self.path))
+        if not key:
+            raise error.Error('key 0 marks empty slots, it cannot be stored')
+        if key not in self._cache and self._find(key) < 0:
+            # reserve the slot now so that `len` and lookups see the key
+            self._insert(key)
+        cache = self._cache
+        cache[key] = np.array(values, dtype=np.float32)
+        cache.move_to_end(key)
+        self._dirty.add(key)
+        if len(cache) > self.capacity:
+            self._evict()
+
+    def _evict(self):
+        cache, dirty = self._cache, self._dirty
+        while len(cache) > self.capacity:
+            key, values = cache.popitem(last=False)
+            if key in dirty:
+                dirty.discard(key)
+                self._strategy[self._find(key)] = values
+
+    def _insert(self, key):
+        if 2 * (self._count + 1) > len(self._keys):
+            self._grow()
+        keys, mask = self._keys, self._mask
+        slot = key & mask
+        while keys[slot]:
+            slot = (slot + 1) & mask
+        keys[slot] = key
+        self._count += 1
+        return slot
+
+    def _grow(self):
+        """ double the file, rehashing every row """
+        old = self._table
+        tmp = self.path + '.tmp.npy'
+        table = np.lib.format.open_memmap(tmp, mode='w+', dtype=old.dtype, shape=(2 * len(old),))
+        _fill(table, old['key'], old['strategy'])
+        table.flush()
+        del old, self._table, self._keys, self._strategy, self._buffer
+        del table
+        os.replace(tmp, self.path)
+        self._open(np.load(self.path, mmap_mode='r+'))
+
+    def flush(self):
+        """ write the rows changed in memory to the file """
+        if self.readonly:
+            return
+        for key in self._dirty:
+            self._strategy[self._find(key)] = self._cache[key]
+        self._dirty.clear()
+        self._table.flush()
+
+    def close(self):
+        self.flush()
+        self._cache.clear()
+
+    @staticmethod
+    def build(path, keys, strategy, capacity=65536, meta=None, mode='a'):
+        """ write a store of all the rows at once (e.g. a solver policy) and open it """
+        keys = np.asarray(keys, dtype=np.uint64)
+        if not keys.all():
+            raise error.Error('key 0 marks empty slots, it cannot be stored')
+        table = np.lib.format.open_memmap(path, mode='w+', dtype=StrategyStore._dtype(strategy.shape[1]),
+                                          shape=(_power_of_two(2 * len(keys)),))
+        _fill(table, keys, strategy)
+        table.flush()
+        del table
+        if meta is not None:
+            with open(path + '.json', 'w') as f:
+                json.dump(meta, f)
+        return StrategyStore(path, capacity=capacity, mode=mode)
+
+
+def _power_of_two(n):
+    return 1 << max(int(n) - 1, 1).bit_length()
+
+
+def _fill(table, keys, strategy):
+    """ linear probing insertion of distinct non zero keys, vectorized by probe step """
+    mask = len(table) - 1
+    new_keys = table['key']
+    new_strategy = table['strategy']
+    pending = np.flatnonzero(keys)
+    slots = keys[pending] & np.uint64(mask)
+    while len(pending):
+        free = new_keys[slots] == 0
+        # one key per free slot, the others probe further
+        placed_slots, first = np.unique(slots[free], return_index=True)
+        placed = np.flatnonzero(free)[first]
+        new_keys[placed_slots] = keys[pending[placed]]
+        new_strategy[placed_slots] = strategy[pending[placed]]
+        left = np.ones(len(pending), dtype=bool)
+        left[placed] = False
+        pending = pending[left]
+        slots = (slots[left] + np.uint64(1)) & np.uint64(mask)
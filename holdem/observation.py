@@ -0,0 +1,185 @@
+import numpy as np
+
+from gym import spaces
+
+from treys.lookup import LookupTable
+
+from .deck import CARD_INDEX, FULL_DECK
+from .utils import PLAYER_STATE, COMMUNITY_STATE, STATE, action_table
+
+# columns of the 'players' block: the PLAYER_STATE fields, without reloadCount and hand
+PLAYER_FEATURES = PLAYER_STATE._fields[:9]
+# the 'community' block: the COMMUNITY_STATE fields
+COMMUNITY_FEATURES = COMMUNITY_STATE._fields
+
+
+class ArrayObservation(object):
+    """
+    Observation of a TexasHoldemEnv kept in a single flat int64 array, written in place by the env.
+    `blocks` are views of `flat`:
+        players, (n_seats, 9), PLAYER_FEATURES of every seat
+        hands, (n_seats, 2), pocket cards of every seat
+        community, (8,), COMMUNITY_FEATURES
+        community_cards, (5,), community cards
+        legal, (6,), legal action mask of the current player by action_table id (check, call, raise, fold),
+                     then the raise range [minraise, maxraise] (0, 0 when raising is not allowed)
+        abstract_legal, (n_abstract,), legal abstract actions of the current player (see ActionAbstraction)
+    Cards are card indices (0..51, see `holdem.deck.FULL_DECK`), -1 when not dealt.
+    """
+
+    def __init__(self, n_seats, n_abstract=6):
+        self.n_seats = n_seats
+        shapes = [
+            ('players', (n_seats, len(PLAYER_FEATURES))),
+            ('hands', (n_seats, 2)),
+            ('community', (len(COMMUNITY_FEATURES),)),
+            ('community_cards', (5,)),
+            ('legal', (6,)),
+            ('abstract_legal', (n_abstract,)),
+        ]
+        self.flat = np.zeros(sum(int(np.prod(shape)) for _, shape in shapes), dtype=np.int64)
+        self.blocks = {}
+        offset = 0
+        for name, shape in shapes:
+            size = int(np.prod(shape))
+            self.blocks[name] = self.flat[offset:offset + size].reshape(shape)
+            offset += size
+        self.players = self.blocks['players']
+        self.hands = self.blocks['hands']
+        self.community = self.blocks['community']
+        self.community_cards = self.blocks['community_cards']
+        self.legal = self.blocks['legal']
+        self.abstract_legal = self.blocks['abstract_legal']
+
+    def bounds(self, max_limit):
+        """ (low, high) dicts of int64 arrays shaped like the blocks, chips are bounded by `max_limit` """
+        n = self.n_seats
+        low = {name: np.zeros_like(block) for name, block in self.blocks.items()}
+        high = {name: np.zeros_like(block) for name, block in self.blocks.items()}
+        # emptyplayer, seat, stack, playing_hand, handrank, playedthisround, betting, isallin, lastsidepot
+        low['players'][:] = [0, -1, 0, 0, -1, 0, 0, 0, 0]
+        high['players'][:] = [1, n - 1, max_limit, 1, LookupTable.MAX_HIGH_CARD, 1, max_limit, 1, n - 1]
+        low['hands'][:] = -1
+        high['hands'][:] = 51
+        # button, smallblind, bigblind, totalpot, lastraise, call_price, to_call, current_player
+        low['community'][:] = [0, 0, 0, 0, 0, 0, 0, -1]
+        high['community'][:] = [n - 1, max_limit, max_limit, max_limit * n, max_limit, max_limit, max_limit, n - 1]
+        low['community_cards'][:] = -1
+        high['community_cards'][:] = 51
+        high['legal'][:] = [1, 1, 1, 1, max_limit, max_limit]
+        high['abstract_legal'][:] = 1
+        return low, high
+
+    def flat_space(self, max_limit):
+        """ Box of the `flat` array """
+        low, high = self.bounds(max_limit)
+        return spaces.Box(np.concatenate([low[name].ravel() for name in self.blocks]),
+                          np.concatenate([high[name].ravel() for name in self.blocks]), dtype=np.int64)
+
+    def dict_space(self, max_limit):
+        """ Dict of one Box per block """
+        low, high = self.bounds(max_limit)
+        return spaces.Dict({name: spaces.Box(low[name], high[name], dtype=np.int64) for name in self.blocks})
+
+    def write_player(self, seat, player):
+        self.players[seat] = (player.emptyplayer, player.get_seat(), player.stack, player.playing_hand,
+                              player.handrank, player.playedthisround, player.betting, player.isallin,
+                              player.lastsidepot)
+
+    def write_cards(self, seats, community):
+        hands = self.hands
+        for seat, player in enumerate(seats):
+            hand = player.hand
+            hands[seat] = (CARD_INDEX[hand[0]], CARD_INDEX[hand[1]]) if hand else (-1, -1)
+        cards = self.community_cards
+        cards[:] = -1
+        for i, card in enumerate(community):
+            cards[i] = CARD_INDEX[card]
+
+    def write_community(self, button, smallblind, bigblind, totalpot, lastraise, call_price, to_call,
+                        current_player):
+        self.community[:] = (button, smallblind, bigblind, totalpot, lastraise, call_price, to_call, current_player)
+
+    def write_legal(self, valid_actions):
+        """ `valid_actions` as returned by `TexasHoldemEnv.get_valid_actions`, empty when nobody has to act """
+        legal_action_mask(valid_actions, self.legal[:4])
+        raise_range = valid_actions.get('raise_range') if valid_actions else None
+        self.legal[4:] = raise_range if raise_range else (0, 0)
+
+    def write_state(self, state):
+        """ write a STATE observation (cards are treys cards), legal actions are not part of it """
+        for seat, player in enumerate(state.player_states):
+            self.players[seat] = player[:9]
+            self.hands[seat] = [CARD_INDEX.get(card, -1) for card in player.hand]
+        self.community[:] = state.community_state
+        self.community_cards[:] = [CARD_INDEX.get(card, -1) for card in state.community_card]
+
+
+class StateSpace(spaces.Space):
+    """
+    Space of the STATE observations of the 'tuple' obs_mode: the 'players', 'hands', 'community' and
+    'community_cards' blocks of an ArrayObservation, with treys cards (-1 when not dealt) instead of card indices.
+    `contains` writes a STATE into an ArrayObservation and checks the blocks against their bounds, `sample` draws
+    them from their bounds.
+    """
+
+    BLOCKS = ('players', 'hands', 'community', 'community_cards')
+
+    def __init__(self, n_seats, max_limit, seed=None):
+        self.n_seats = n_seats
+        self.max_limit = max_limit
+        self._layout = ArrayObservation(n_seats)
+        low, high = self._layout.bounds(max_limit)
+        self.low = {name: low[name] for name in self.BLOCKS}
+        self.high = {name: high[name] for name in self.BLOCKS}
+        super(StateSpace, self).__init__(None, None, seed)
+
+    def contains(self, x):
+        if not isinstance(x, tuple) or len(x) != len(STATE._fields):
+            return False
+        player_states, community_state, community_card = x
+        if (len(player_states) != self.n_seats or len(community_state) != len(COMMUNITY_STATE._fields)
+                or len(community_card) != 5):
+            return False
+        layout = self._layout
+        try:
+            for seat, player in enumerate(player_states):
+                if len(player) != len(PLAYER_STATE._fields) or len(player[-1]) != 2:
+                    return False
+                layout.players[seat] = player[:len(PLAYER_FEATURES)]
+                layout.hands[seat] = [-1 if card == -1 else CARD_INDEX[card] for card in player[-1]]
+            layout.community[:] = community_state
+            layout.community_cards[:] = [-1 if card == -1 else CARD_INDEX[card] for card in community_card]
+        except (KeyError, TypeError, ValueError):
+            return False
+        return all(((self.low[name] <= layout.blocks[name]) & (layout.blocks[name] <= self.high[name])).all()
+                   for name in self.BLOCKS)
+
+    def sample(self, mask=None):
+        blocks = {name: self.np_random.integers(self.low[name], self.high[name], endpoint=True)
+                  for name in self.BLOCKS}
+        cards = np.append(FULL_DECK, -1)
+        player_states = tuple(PLAYER_STATE(*row.tolist(), 0, cards[hand].tolist())
+                              for row, hand in zip(blocks['players'], blocks['hands']))
+        return STATE(player_states, COMMUNITY_STATE(*blocks['community'].tolist()),
+                     cards[blocks['community_cards']].tolist())
+
+    def __eq__(self, other):
+        return isinstance(other, StateSpace) and (self.n_seats, self.max_limit) == (other.n_seats, other.max_limit)
+
+    def __repr__(self):
+        return 'StateSpace({}, {})'.format(self.n_seats, self.max_limit)
+
+
+def legal_action_mask(valid_actions, out=None):
+    """ mask of the legal actions, indexed by action_table id (CHECK, CALL, RAISE, FOLD) """
+    if out is None:
+        out = np.zeros(4, dtype=bool)
+    if not valid_actions:
+        out[:] = 0
+        return out
+    out[action_table.CHECK] = valid_actions['check']
+    out[action_table.CALL] = valid_actions['call']
+    out[action_table.RAISE] = valid_actions['raise']
+    out[action_table.FOLD] = valid_actions['fold']
+    return out
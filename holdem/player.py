@@ -1,4 +1,5 @@
 
+from operator import attrgetter
 from random import randint
 
 from gym import error
@@ -7,6 +8,10 @@ from treys import Card
 
 
 class Player(object):
+    # no per-instance __dict__: tables are held by the thousands (self-play pools, search trees)
+    __slots__ = ('player_id', 'playername', 'reloadCount', 'hand', 'stack', '_init_stack', 'currentbet', 'lastsidepot',
+                 '_seat', 'handrank', 'emptyplayer', 'betting', 'isallin', 'playing_hand', 'playedthisround',
+                 'sitting_out', '_roundRaiseLimit', '_roundRaiseCount')
 
     CHECK = 0
     CALL = 1
@@ -36,6 +41,14 @@ class Player(object):
         self._roundRaiseLimit = roundRaiseLimit
         self._roundRaiseCount = 0
 
+    def copy(self):
+        """ independent copy of the player (its own hand list) """
+        other = Player.__new__(Player)
+        for name, value in zip(Player.__slots__, _slot_values(self)):
+            setattr(other, name, value)
+        other.hand = list(self.hand)
+        return other
+
     def get_name(self):
         return self.playername
 
@@ -46,12 +59,12 @@ class Player(object):
         self._seat = value
 
     def reset_hand(self):
-        self._hand = []
         self.playedthisround = False
         self.betting = 0
         self.isallin = False
         self.currentbet = 0
         self.lastsidepot = 0
+        self.handrank = -1
         self.playing_hand = (self.stack != 0)
 
     def bet(self, bet_size):
@@ -120,3 +133,6 @@ class Player(object):
             else:
                 raise error.Error('Invalid action ({})!'.format(action_idx))
         return move_tuple
+
+
+_slot_values = attrgetter(*Player.__slots__)
@@ -0,0 +1,161 @@
+import bisect
+import json
+import sys
+import time
+
+# env methods timed by each phase, times are inclusive: 'step' contains the phases it calls
+PHASES = {
+    'reset': ['reset'],
+    'step': ['step'],
+    'deal': ['deal_card'],
+    'runout': ['_two_players_all_in'],
+    'side_pots': ['_layered_pots'],
+    'showdown': ['cycle_checkout'],
+    'observation': ['_get_observation'],
+    'validation': ['_decision_state'],
+}
+
+# upper bounds (seconds) of the decision latency histogram bins, the last bin is unbounded
+LATENCY_BINS = [1e-6 * 2 ** i for i in range(21)]
+
+
+class phase_counter(object):
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.depth = 0
+
+
+class EnvProfiler(object):
+    """
+    Per-phase timers of a TexasHoldemEnv, see `TexasHoldemEnv.enable_profiling`.
+    The timed methods are wrapped on the env instance only while the profiler is attached,
+    a detached env runs its plain methods.
+    """
+
+    def __init__(self, env, dump_at_episode_end=None):
+        """
+            @param: dump_at_episode_end, None, a file path (JSON lines are appended) or '-' (stderr),
+                    the report is written every time an episode ends
+        """
+        self.env = env
+        self.dump_at_episode_end = dump_at_episode_end
+        self.phases = {name: phase_counter() for name in PHASES}
+        self.latency_counts = [0] * (len(LATENCY_BINS) + 1)
+        self.decisions = 0
+        self.decision_seconds = 0.0
+        self.start = time.perf_counter()
+        self._wrapped = []
+
+    def attach(self):
+        for phase, methods in PHASES.items():
+            for name in methods:
+                setattr(self.env, name, self._timed(getattr(self.env, name), self.phases[phase]))
+                self._wrapped.append(name)
+        for name in ('reset', 'step'):
+            setattr(self.env, name, self._episode_watch(getattr(self.env, name)))
+        return self
+
+    def detach(self):
+        for name in set(self._wrapped):
+            self.env.__dict__.pop(name, None)
+        self._wrapped = []
+
+    def _timed(self, method, counter):
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            counter.depth += 1
+            t = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                counter.depth -= 1
+                # recursive calls are counted once, by the outermost call
+                if not counter.depth:
+                    counter.calls += 1
+                    counter.seconds += clock() - t
+        return timed
+
+    def _episode_watch(self, method):
+        def watched(*args, **kwargs):
+            ended = self.env.episode_end
+            result = method(*args, **kwargs)
+            if self.env.episode_end and not ended and self.dump_at_episode_end:
+                self.dump(self.dump_at_episode_end)
+            return result
+        return watched
+
+    def record_decision(self, seconds):
+        self.decisions += 1
+        self.decision_seconds += seconds
+        self.latency_counts[bisect.bisect_left(LATENCY_BINS, seconds)] += 1
+
+    def wrap_models(self, model_list):
+        """ models timing their `takeAction` calls into the decision latency histogram """
+        return [_timed_model(model, self) for model in model_list]
+
+    def latency_quantile(self, q):
+        """ upper bound of the histogram bin holding the q quantile of the decision latencies """
+        if not self.decisions:
+            return float('nan')
+        target = q * self.decisions
+        seen = 0
+        for i, count in enumerate(self.latency_counts):
+            seen += count
+            if seen >= target:
+                return LATENCY_BINS[i] if i < len(LATENCY_BINS) else float('inf')
+        return float('inf')
+
+    def report(self):
+        elapsed = time.perf_counter() - self.start
+        cycles = self.phases['reset'].calls
+        actions = self.phases['step'].calls
+        return {
+            'elapsed': elapsed,
+            'hands_per_s': cycles / elapsed if elapsed else 0.0,
+            'actions_per_s': actions / elapsed if elapsed else 0.0,
+            'phases': {name: {'calls': c.calls, 'seconds': c.seconds,
+                              'us_per_call': 1e6 * c.seconds / c.calls if c.calls else 0.0}
+                       for name, c in self.phases.items()},
+            'decisions': {
+                'count': self.decisions,
+                'seconds': self.decision_seconds,
+                'p50': self.latency_quantile(0.5),
+                'p90': self.latency_quantile(0.9),
+                'p99': self.latency_quantile(0.99),
+                'histogram': {'bins': LATENCY_BINS, 'counts': list(self.latency_counts)},
+            },
+        }
+
+    def dump(self, path='-'):
+        """ write the report as one JSON line, to stderr when path is '-' """
+        line = json.dumps(self.report())
+        if path == '-':
+            print(line, file=sys.stderr)
+        else:
+            with open(path, 'a') as f:
+                f.write(line + '\n')
+
+    def reset_counters(self):
+        for c in self.phases.values():
+            c.calls, c.seconds = 0, 0.0
+        self.latency_counts = [0] * (len(LATENCY_BINS) + 1)
+        self.decisions = 0
+        self.decision_seconds = 0.0
+        self.start = time.perf_counter()
+
+
+class _timed_model(object):
+    def __init__(self, model, profiler):
+        self.model = model
+        self.profiler = profiler
+
+    def takeAction(self, *args):
+        t = time.perf_counter()
+        action = self.model.takeAction(*args)
+        self.profiler.record_decision(time.perf_counter() - t)
+        return action
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
@@ -0,0 +1,129 @@
+from collections import namedtuple
+from multiprocessing import Pool
+
+import numpy as np
+
+from gym import error
+
+from .deck import FULL_DECK
+from .env import TexasHoldemEnv
+from .history import history_event, read_history
+from .utils import ACTION, action_table
+
+REPLAY_STEP = namedtuple('replay_step', ['hand_id', 'round', 'seat', 'state', 'action'])
+'''
+hand_id, (number), hand_id of the recorded cycle
+round, (number), round of the decision (0: preflop ... 3: river)
+seat, (id), the player taking the action
+state, (STATE), observation of the player before the action, as given to `takeAction`
+action, (ACTION), the recorded action
+'''
+
+
+class ReplayDeck(object):
+    """ deck dealing a given card order, used in place of the NumpyDeck of the env """
+
+    def __init__(self):
+        self.order = []
+        self.cards = []
+
+    def shuffle(self):
+        self.cards = self.order[::-1]
+
+    def draw(self, n=1):
+        if n == 1:
+            return self.cards.pop()
+        return [self.cards.pop() for _ in range(n)]
+
+
+def split_hands(records):
+    """ split a record array into the record arrays of each cycle """
+    starts = np.flatnonzero(records['event'] == history_event.CYCLE_START)
+    return np.split(records, starts[1:]) if len(starts) else []
+
+
+def make_replay_env(n_seats):
+    env = TexasHoldemEnv(n_seats, headless=True)
+    env.blind_increment = False
+    env._deck = ReplayDeck()
+    for seat in range(n_seats):
+        env.add_player(seat, stack=0)
+        env._seats[seat].sitting_out = False
+    return env
+
+
+def _deal_order(hand):
+    """ order in which the env draws the cards of a recorded hand (burn cards are unused cards) """
+    dealt = []
+    for r in hand[hand['event'] == history_event.HOLE_CARDS]:
+        dealt += [int(r['cards'][0]), int(r['cards'][1])]
+    boards = [[int(c) for c in r['cards'] if c != -1] for r in hand[hand['event'] == history_event.BOARD]]
+    used = set(dealt + [c for b in boards for c in b])
+    burns = [c for c in FULL_DECK.tolist() if c not in used]
+    for board in boards:
+        dealt.append(burns.pop())
+        dealt += board
+    return dealt
+
+
+def replay_hand(env, hand, start_round=0):
+    """
+    Replay the records of one cycle on `env` (see `make_replay_env`), yield a REPLAY_STEP
+    for every recorded action of a round >= start_round.
+    """
+    start = hand[0]
+    if start['event'] != history_event.CYCLE_START:
+        raise error.Error('hand records must start with a CYCLE_START record')
+    hand_id = int(start['hand_id'])
+    for r in hand[hand['event'] == history_event.STACK]:
+        env._seats[r['seat']].stack = int(r['amount'])
+    env._button = (int(start['seat']) - 1) % env.n_seats
+    env._blind_index = TexasHoldemEnv.BLIND_INCREMENTS.index([int(start['cards'][0]), int(start['amount'])])
+    env._deck.order = _deal_order(hand)
+
+    state, terminal = env.reset()
+    for r in hand[hand['event'] == history_event.ACTION]:
+        if terminal:
+            raise error.Error('hand {}: action recorded after the end of the cycle'.format(hand_id))
+        seat = int(r['seat'])
+        if env._current_player.player_id != seat:
+            raise error.Error('hand {}: seat {} acts but the env waits for seat {}'.format(
+                hand_id, seat, env._current_player.player_id))
+        action = ACTION(int(r['action']), int(r['amount']))
+        if r['round'] >= start_round:
+            yield REPLAY_STEP(hand_id, int(r['round']), seat, state, action)
+        actions = [[action_table.CHECK, action_table.NA]] * env.n_seats
+        actions[seat] = [action.action, action.amount]
+        state, _, terminal, _ = env.step(actions)
+
+
+def replay_history(records, start_hand=0, start_round=0):
+    """
+    Generator of REPLAY_STEP over the recorded hands with hand_id >= start_hand (and, for start_hand itself,
+    round >= start_round). Hands before start_hand are skipped without being played.
+    """
+    hands = split_hands(records)
+    if not hands:
+        return
+    env = make_replay_env(int((hands[0]['event'] == history_event.STACK).sum()))
+    for hand in hands:
+        hand_id = hand[0]['hand_id']
+        if hand_id < start_hand:
+            continue
+        for step in replay_hand(env, hand, start_round if hand_id == start_hand else 0):
+            yield step
+
+
+def _replay_file(args):
+    fn, path = args
+    return fn(replay_history(read_history(path)))
+
+
+def parallel_replay(paths, fn, processes=None):
+    """
+    Replay history files (shards) in a process pool, `fn(steps)` is called in the workers with the
+    REPLAY_STEP generator of one file and must be picklable (a module level function).
+    Returns the list of `fn` results, in `paths` order.
+    """
+    with Pool(processes) as pool:
+        return pool.map(_replay_file, [(fn, path) for path in paths])
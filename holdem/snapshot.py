@@ -0,0 +1,135 @@
+import struct
+
+import numpy as np
+from gym import error
+
+# table scalars, seats are stored by index in `env._seats` (-1 for none)
+SCALAR_FIELDS = ['cycle', 'blind_index', 'smallblind', 'bigblind', 'blind_increment', 'round', 'button', 'totalpot',
+                 'tocall', 'lastraise', 'roundpot', 'current_player', 'last_player', 'has_last_actions',
+                 'episode_end', 'round_terminate', 'deck_top', 'n_side_pots', 'history_key']
+
+# per seat, cards are treys ints (0 for no card), fold_order is the position in `_folded_players` plus one (0 if
+# the player did not fold this cycle), last_action/last_amount the row of the seat in the last step() actions
+SEAT_FIELDS = ['emptyplayer', 'player_id', 'seat', 'stack', 'init_stack', 'currentbet', 'betting', 'lastsidepot',
+               'handrank', 'isallin', 'playing_hand', 'playedthisround', 'sitting_out', 'round_raise_count',
+               'reload_count', 'card_0', 'card_1', 'fold_order', 'last_action', 'last_amount']
+
+N_SCALARS = len(SCALAR_FIELDS)
+N_SEAT_FIELDS = len(SEAT_FIELDS)
+
+# the unsigned 64-bit history key is stored as a signed int64
+_SIGN = 1 << 63
+_MOD = 1 << 64
+
+
+# int64 packing of the scalars, seats and community cards of a table, by number of seats
+_HEADERS = {}
+
+
+def state_size(n_seats):
+    """ length of the `get_state` array of a table: scalars, seats, community cards, deck, side pots """
+    return N_SCALARS + n_seats * N_SEAT_FIELDS + 5 + 52 + n_seats
+
+
+def _header(n_seats):
+    header = _HEADERS.get(n_seats)
+    if header is None:
+        header = _HEADERS[n_seats] = struct.Struct('={}q'.format(N_SCALARS + n_seats * N_SEAT_FIELDS + 5))
+    return header
+
+
+def get_state(env, out=None):
+    """
+    Game state of `env` (a TexasHoldemEnv) as a fixed size int64 array, written into `out` when given.
+    The env generator is not part of it: the deck order of the cycle is, the next cycles are shuffled by the
+    generator of the env the state is restored into.
+    """
+    n = env.n_seats
+    if out is None:
+        out = np.empty(state_size(n), dtype=np.int64)
+    seats = env._seats
+    index = {id(p): i for i, p in enumerate(seats)}
+    current, last = env._current_player, env._last_player
+    last_actions = env._last_actions
+    side_pots = env._side_pots
+    history_key = env._history_key
+    values = [env._cycle, env._blind_index, env._smallblind, env._bigblind, int(env.blind_increment), env._round,
+              env._button, env._totalpot, env._tocall, env._lastraise, env._roundpot,
+              index[id(current)] if current is not None else -1, index[id(last)] if last is not None else -1,
+              int(last_actions is not None), int(env.episode_end), int(getattr(env, 'round_terminate', False)),
+              env._deck._top, len(side_pots), history_key - _MOD if history_key >= _SIGN else history_key]
+    folded = {id(p): i + 1 for i, p in enumerate(getattr(env, '_folded_players', []))}
+    for i, p in enumerate(seats):
+        hand = p.hand
+        action = last_actions[i] if last_actions is not None else (0, 0)
+        values += [int(p.emptyplayer), p.player_id, p._seat, p.stack, p._init_stack, p.currentbet, p.betting,
+                   p.lastsidepot, p.handrank, int(p.isallin), int(p.playing_hand), int(p.playedthisround),
+                   int(p.sitting_out), p._roundRaiseCount, p.reloadCount, hand[0] if hand else 0,
+                   hand[1] if hand else 0, folded.get(id(p), 0), int(action[0]), int(action[1])]
+    community = env.community
+    values += community + [0] * (5 - len(community))
+    header = _header(n)
+    header.pack_into(out, 0, *values)
+    end = len(values)
+    out[end:end + 52] = env._deck._cards
+    out[end + 52:] = 0
+    out[end + 52:end + 52 + len(side_pots)] = side_pots
+    return out
+
+
+def set_state(env, state):
+    """ restore a `get_state` array into `env`, a table of the same size (players are seated or removed to match) """
+    n = env.n_seats
+    if len(state) != state_size(n):
+        raise error.Error('state of size {} is not a {} seats state'.format(len(state), n))
+    state = np.ascontiguousarray(state, dtype=np.int64)
+    values = _header(n).unpack_from(state)
+    (env._cycle, env._blind_index, env._smallblind, env._bigblind, blind_increment, env._round, env._button,
+     env._totalpot, env._tocall, env._lastraise, env._roundpot, current, last, has_last_actions, episode_end,
+     round_terminate, deck_top, n_side_pots, history_key) = values[:N_SCALARS]
+    env._history_key = history_key % _MOD
+    env.blind_increment = bool(blind_increment)
+    env.episode_end = bool(episode_end)
+    env.round_terminate = bool(round_terminate)
+
+    folded = []
+    last_actions = []
+    hands = set()
+    for i in range(n):
+        start = N_SCALARS + i * N_SEAT_FIELDS
+        (emptyplayer, player_id, seat, stack, init_stack, currentbet, betting, lastsidepot, handrank, isallin,
+         playing_hand, playedthisround, sitting_out, round_raise_count, reload_count, card_0, card_1, fold_order,
+         last_action, last_amount) = values[start:start + N_SEAT_FIELDS]
+        if emptyplayer != env._seats[i].emptyplayer:
+            if emptyplayer:
+                env.remove_player(i)
+            else:
+                env.add_player(i)
+        p = env._seats[i]
+        p.player_id, p._seat, p.stack, p._init_stack = player_id, seat, stack, init_stack
+        p.currentbet, p.betting, p.lastsidepot, p.handrank = currentbet, betting, lastsidepot, handrank
+        p.isallin, p.playing_hand, p.playedthisround = bool(isallin), bool(playing_hand), bool(playedthisround)
+        p.sitting_out, p._roundRaiseCount, p.reloadCount = bool(sitting_out), round_raise_count, reload_count
+        p.hand = [card_0, card_1] if card_0 else []
+        if fold_order:
+            folded.append((fold_order, p))
+        if playing_hand or fold_order:
+            hands.update(p.hand)
+        last_actions.append([last_action, last_amount])
+
+    seats = env._seats
+    env._current_player = seats[current] if current >= 0 else None
+    env._last_player = seats[last] if last >= 0 else None
+    env._last_actions = last_actions if has_last_actions else None
+    env._folded_players = [p for _, p in sorted(folded, key=lambda x: x[0])]
+    env.emptyseats = sum([1 for p in seats if p.emptyplayer])
+
+    offset = N_SCALARS + n * N_SEAT_FIELDS
+    env.community = [c for c in values[offset:offset + 5] if c]
+    deck = env._deck
+    deck._cards[:] = state[offset + 5:offset + 57]
+    deck._top = deck_top
+    env._side_pots = state[offset + 57:offset + 57 + n_side_pots].tolist()
+    # the discarded cards are the drawn cards nobody holds
+    community = set(env.community)
+    env._discard = [c for c in deck._cards[:deck_top].tolist() if c not in hands and c not in community]
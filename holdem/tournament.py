@@ -0,0 +1,136 @@
+import importlib
+import itertools
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .env import TexasHoldemEnv
+from .evaluator import get_numpy_evaluator
+from .utils import model_list_action
+
+
+def load_agent(spec):
+    """
+    Build a new agent from its spec, 'module.Class' or 'module:Class' (e.g. 'agent.randomModel'),
+    optionally followed by keyword arguments: ('agent.randomModel', {...}).
+    """
+    path, kwargs = (spec, {}) if isinstance(spec, str) else spec
+    module, _, name = path.replace(':', '.').rpartition('.')
+    return getattr(importlib.import_module(module), name)(**kwargs)
+
+
+def spec_name(spec):
+    return spec if isinstance(spec, str) else spec[0]
+
+
+def episode_seed(seed, episode):
+    return int(np.random.SeedSequence([seed, episode]).generate_state(1)[0])
+
+
+def play_episode(env, models, stack=1000):
+    """ play one episode (until a player is out), return the final stacks """
+    env.episode_reset()
+    for p in env._seats:
+        p.__init__(p.player_id, stack)
+        p.set_seat(p.player_id)
+    while not env.episode_end:
+        cur_state, cycle_terminal = env.reset()
+        if env.episode_end:
+            break
+        valid_actions = env.get_valid_actions(env._current_player)
+        while not cycle_terminal:
+            actions = model_list_action(cur_state, n_seats=env.n_seats, model_list=models,
+                                        valid_actions=valid_actions)
+            cur_state, rews, cycle_terminal, valid_actions = env.step(actions)
+            if env.episode_end:
+                break
+    return [p.stack for p in env._seats]
+
+
+def _play_episodes(args):
+    """ worker: play the given episodes of a heads-up match, return [chips won by agent a, a won] per episode """
+    spec_a, spec_b, episodes, seed, stack, blind_increment = args
+    env = TexasHoldemEnv(2, headless=True, evaluator=get_numpy_evaluator())
+    env.add_player(0, stack=stack)
+    env.add_player(1, stack=stack)
+    # new agents per chunk, one per seat even for equal specs
+    agent_a, agent_b = load_agent(spec_a), load_agent(spec_b)
+    for agent in (agent_a, agent_b):
+        # agents following the game events (e.g. agent.cfrModel)
+        if hasattr(agent, 'attach'):
+            agent.attach(env)
+    results = []
+    for episode in episodes:
+        s = episode_seed(seed, episode)
+        # the env generator shuffles the deck, agents may use the global generators or their own (`seed(s)`)
+        env.seed(s)
+        random.seed(s)
+        np.random.seed(s % (1 << 32))
+        for agent in (agent_a, agent_b):
+            if hasattr(agent, 'seed'):
+                agent.seed(s)
+        # swap the seats every episode
+        a_seat = episode % 2
+        models = [agent_a, agent_b] if a_seat == 0 else [agent_b, agent_a]
+        env.blind_increment = blind_increment
+        stacks = play_episode(env, models, stack)
+        results.append([stacks[a_seat] - stack, stacks[a_seat] > stacks[1 - a_seat]])
+    return results
+
+
+def summarize(spec_a, spec_b, results):
+    """ chips and win rate of agent a, with 95% confidence intervals (normal for chips, Wilson for the win rate) """
+    results = np.asarray(results, dtype=np.float64).reshape(-1, 2)
+    n = len(results)
+    chips, wins = results[:, 0], results[:, 1]
+    chips_ci = 1.96 * chips.std(ddof=1) / math.sqrt(n) if n > 1 else float('nan')
+    p = wins.mean() if n else float('nan')
+    z = 1.96
+    center = (p + z * z / (2 * n)) / (1 + z * z / n) if n else float('nan')
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n) if n else float('nan')
+    return {
+        'agents': [spec_name(spec_a), spec_name(spec_b)],
+        'episodes': n,
+        'chips_mean': float(chips.mean()) if n else float('nan'),
+        'chips_ci95': [float(chips.mean() - chips_ci), float(chips.mean() + chips_ci)] if n else [],
+        'win_rate': float(p),
+        'win_rate_ci95': [float(center - half), float(center + half)],
+    }
+
+
+def _match_tasks(spec_a, spec_b, n_episodes, seed, stack, blind_increment, chunk_size):
+    return [(spec_a, spec_b, range(i, min(i + chunk_size, n_episodes)), seed, stack, blind_increment)
+            for i in range(0, n_episodes, chunk_size)]
+
+
+def run_match(spec_a, spec_b, n_episodes, workers=None, **kwargs):
+    """
+    Play `n_episodes` heads-up episodes of agent a against agent b over a process pool,
+    see `run_tournament` for the keyword arguments.
+    """
+    return run_tournament([spec_a, spec_b], n_episodes, workers, **kwargs)[0]
+
+
+def run_tournament(specs, n_episodes, workers=None, seed=0, stack=1000, blind_increment=True, chunk_size=None):
+    """
+    Round robin: `n_episodes` heads-up episodes for every pair of agents, all fanned out over one process pool.
+    Every episode is seeded from (seed, episode index) so the results do not depend on the number of workers:
+    the env, `random`, `np.random` and the agents defining `seed(s)` are seeded at every episode. Agents are built
+    from their spec inside the workers, new ones for every chunk of episodes and seat (see `load_agent`), an agent
+    keeping other state across episodes (e.g. online training) only sees the episodes of its chunk.
+    Returns a `summarize` dict per pair.
+    """
+    pairs = list(itertools.combinations(specs, 2))
+    if chunk_size is None:
+        chunk_size = max(1, n_episodes * len(pairs) // (4 * (workers or os.cpu_count() or 1)))
+    tasks = [_match_tasks(a, b, n_episodes, seed, stack, blind_increment, chunk_size) for a, b in pairs]
+    with ProcessPoolExecutor(workers) as pool:
+        chunks = list(pool.map(_play_episodes, itertools.chain.from_iterable(tasks)))
+    summaries = []
+    for (a, b), match_tasks in zip(pairs, tasks):
+        results, chunks = chunks[:len(match_tasks)], chunks[len(match_tasks):]
+        summaries.append(summarize(a, b, list(itertools.chain.from_iterable(results))))
+    return summaries
@@ -13,7 +13,7 @@ handrank, (number), treys.Evaluator.evaluate(hand, community)
 playedthisround, (boolean), whether player is plaed this round (1 cycle has 4 rounds)
 betting, (number), how much amount players have betting in this cycle
 isallin, (boolean), 0 not all in, 1 all in
-lastsidepot, (numer), resolve when someone all in  <NOT USING NOW>
+lastsidepot, (numer), index of the last pot (0 is the main pot) the player can win, set at the end of the cycle
 reloadCount, (number), only used when TM's version <ONLY TM USED>
 hand, (list), information about two card <IN TREYS FORMAT>
 '''
@@ -0,0 +1,372 @@
+import numpy as np
+
+from gym import error
+from gym.utils import seeding
+
+from .deck import FULL_DECK
+from .env import TexasHoldemEnv
+from .evaluator import get_numpy_evaluator
+from .utils import action_table
+
+
+class BatchTexasHoldemEnv(object):
+    """
+    N independent NLH tables stepped in lockstep.
+
+    The whole batch is kept as struct-of-arrays NumPy state (one row per table),
+    so a single `step()` plays one action on every table with a handful of array
+    operations instead of N Python-level `TexasHoldemEnv.step()` calls.
+
+    Every table always waits for a decision: when a table finishes its cycle it is
+    settled and a new cycle is dealt immediately (auto-reset), and when a table's
+    episode ends (not more than half of the players have chips left) the stacks
+    are restored and a new episode starts.
+
+    Action convention (same as `TexasHoldemEnv`): one `[action, amount]` row per
+    table for its current player, `amount` is only read for `action_table.RAISE`
+    and is the number of chips the player puts in with this action.
+    """
+
+    def __init__(self, n_envs, n_seats=2, stack=1000, blind_increment=True):
+        if n_seats < 2:
+            raise error.Error('A table needs at least 2 seats.')
+        self.n_envs = n_envs
+        self.n_seats = n_seats
+        self.init_stack = stack
+        self.blind_increment = blind_increment
+        self._rows = np.arange(n_envs)
+        self._seat_idx = np.arange(n_seats)
+        self._blinds = np.array(TexasHoldemEnv.BLIND_INCREMENTS, dtype=np.int64)
+        self._evaluator = get_numpy_evaluator()
+
+        shape = (n_envs, n_seats)
+        # per seat
+        self.stack = np.full(shape, stack, dtype=np.int64)
+        self.currentbet = np.zeros(shape, dtype=np.int64)  # chips put in this round
+        self.betting = np.zeros(shape, dtype=np.int64)  # chips put in this cycle
+        self.playing_hand = np.zeros(shape, dtype=bool)
+        self.isallin = np.zeros(shape, dtype=bool)
+        self.playedthisround = np.zeros(shape, dtype=bool)
+        self.hand = np.full(shape + (2,), -1, dtype=np.int64)  # card indices
+        self.side_pots = np.zeros(shape, dtype=np.int64)  # pots of the last settled cycle
+        # per table
+        self.community = np.full((n_envs, 5), -1, dtype=np.int64)  # card indices
+        self.deck = np.zeros((n_envs, 52), dtype=np.int64)
+        self.deck_pos = np.zeros(n_envs, dtype=np.int64)
+        self.button = np.full(n_envs, -1, dtype=np.int64)
+        self.round = np.zeros(n_envs, dtype=np.int64)
+        self.cycle = np.zeros(n_envs, dtype=np.int64)
+        self.blind_index = np.zeros(n_envs, dtype=np.int64)
+        self.current_player = np.zeros(n_envs, dtype=np.int64)
+        self.tocall = np.zeros(n_envs, dtype=np.int64)  # absolute bet to match in this round
+        self.lastraise = np.zeros(n_envs, dtype=np.int64)
+        self.totalpot = np.zeros(n_envs, dtype=np.int64)
+        self.episode_end = np.zeros(n_envs, dtype=bool)
+
+        self.seed()
+
+    def seed(self, seed=None):
+        self.np_random, seed = seeding.np_random(seed)
+        return [seed]
+
+    @property
+    def smallblind(self):
+        return self._blinds[self.blind_index, 0]
+
+    @property
+    def bigblind(self):
+        return self._blinds[self.blind_index, 1]
+
+    def reset(self, mask=None):
+        """
+        Start a new episode on the tables selected by the boolean `mask` (all tables by default)
+        and deal their first cycle. Returns the stacked observation.
+        """
+        rows = self._rows if mask is None else self._rows[np.asarray(mask, dtype=bool)]
+        self.episode_end[:] = False
+        self._episode_reset(rows)
+        self._start_cycle(rows)
+        return self._get_obs()
+
+    def step(self, actions):
+        """
+        Play one action on every table.
+            @param: actions, int array of shape (n_envs, 2), `[action, amount]` of each table's current player
+            @return: obs, rews (stacks at the end of this step), dones (cycle finished), info
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        if actions.shape != (self.n_envs, 2):
+            raise error.Error('actions must be of shape ({}, 2).'.format(self.n_envs))
+        rows = self._rows
+        cur = self.current_player
+        aid = actions[:, 0]
+        amount = actions[:, 1]
+
+        to_call, minraise, maxraise = self._call_and_raise_range()
+        can_raise = maxraise >= minraise
+        valid = np.where(to_call == 0,
+                         (aid == action_table.CHECK) | (aid == action_table.CALL),
+                         (aid == action_table.CALL) | (aid == action_table.FOLD))
+        valid |= (aid == action_table.RAISE) & can_raise & (amount >= minraise) & (amount <= maxraise)
+        if not valid.all():
+            bad = np.flatnonzero(~valid)
+            raise error.Error('invalid actions on tables {}: {}'.format(bad.tolist(), actions[bad].tolist()))
+
+        chips = np.where(aid == action_table.CALL, to_call, 0)
+        chips = np.where(aid == action_table.RAISE, amount, chips)
+        self._bet(rows, cur, chips)
+        self.playedthisround[rows, cur] = True
+
+        raised = aid == action_table.RAISE
+        if raised.any():
+            r = rows[raised]
+            new_tocall = self.currentbet[r, cur[raised]]
+            self.lastraise[r] = np.maximum(self.lastraise[r], new_tocall - self.tocall[r])
+            self.tocall[r] = new_tocall
+            # everybody else has to act again
+            self.playedthisround[r] = False
+            self.playedthisround[r, cur[raised]] = True
+
+        folded = aid == action_table.FOLD
+        self.playing_hand[rows[folded], cur[folded]] = False
+
+        done = self._advance(rows)
+        rews = self.stack.copy()
+        self.episode_end[:] = False
+        if done.any():
+            self._start_cycle(rows[done])
+        info = self.valid_actions()
+        info['episode_end'] = self.episode_end.copy()
+        return self._get_obs(), rews, done, info
+
+    def valid_actions(self):
+        """
+        Legal actions of every table's current player, as arrays:
+        call amount, and the raise range (no raise allowed when min_raise > max_raise).
+        """
+        to_call, minraise, maxraise = self._call_and_raise_range()
+        return {'to_call': to_call, 'min_raise': minraise, 'max_raise': maxraise}
+
+    def _call_and_raise_range(self):
+        rows = self._rows
+        cur = self.current_player
+        stack = self.stack[rows, cur]
+        to_call = np.minimum(self.tocall - self.currentbet[rows, cur], stack)
+        # the most chips an opponent still in the hand is able to match
+        reach = np.where(self.playing_hand, self.stack + self.currentbet, 0)
+        reach[rows, cur] = 0
+        maxraise = np.minimum(stack, reach.max(axis=1) - self.currentbet[rows, cur])
+        minraise = to_call + np.maximum(self.lastraise, self.bigblind)
+        # a short stack may always raise all-in
+        minraise = np.where((minraise > maxraise) & (maxraise > to_call), maxraise, minraise)
+        minraise = np.where(maxraise > to_call, minraise, maxraise + 1)
+        return to_call, minraise, maxraise
+
+    def _bet(self, rows, seats, chips):
+        chips = np.minimum(chips, self.stack[rows, seats])
+        self.stack[rows, seats] -= chips
+        self.currentbet[rows, seats] += chips
+        self.betting[rows, seats] += chips
+        self.totalpot[rows] += chips
+        self.isallin[rows, seats] |= (self.stack[rows, seats] == 0) & self.playing_hand[rows, seats]
+
+    def _next_seat(self, rows, seats, candidates):
+        """ first seat after `seats` (clockwise, excluded) for which `candidates` (one row per table of `rows`) holds """
+        order = (seats[:, None] + 1 + self._seat_idx) % self.n_seats
+        hit = np.take_along_axis(candidates, order, axis=1)
+        return order[np.arange(len(rows)), hit.argmax(axis=1)]
+
+    def _episode_reset(self, rows):
+        self.stack[rows] = self.init_stack
+        self.cycle[rows] = 0
+        self.blind_index[rows] = 0
+        self.button[rows] = -1
+
+    def _start_cycle(self, rows):
+        """ deal a new cycle on `rows`, settling immediately the cycles where the blinds force an all-in """
+        while len(rows):
+            alive = (self.stack[rows] > 0).sum(axis=1)
+            ended = alive <= self.n_seats // 2
+            if ended.any():
+                self.episode_end[rows[ended]] = True
+                self._episode_reset(rows[ended])
+
+            self.cycle[rows] += 1
+            if self.blind_increment:
+                inc = rows[self.cycle[rows] % self.n_seats == 0]
+                self.blind_index[inc] = np.minimum(self.blind_index[inc] + 1, len(self._blinds) - 1)
+
+            self.currentbet[rows] = 0
+            self.betting[rows] = 0
+            self.isallin[rows] = False
+            self.playedthisround[rows] = False
+            self.side_pots[rows] = 0
+            self.playing_hand[rows] = self.stack[rows] > 0
+            self.community[rows] = -1
+            self.round[rows] = 0
+            self.tocall[rows] = 0
+            self.lastraise[rows] = 0
+            self.totalpot[rows] = 0
+            self.button[rows] = self._next_seat(rows, self.button[rows] % self.n_seats, self.playing_hand[rows])
+
+            # shuffle: argsort of uniform noise is a random permutation per row
+            self.deck[rows] = self.np_random.random((len(rows), 52)).argsort(axis=1)
+            self.hand[rows] = -1
+            seats = self.playing_hand[rows]
+            n_dealt = seats.sum(axis=1)
+            # deal 2 cards to every playing seat, in seat order
+            slot = np.cumsum(seats, axis=1) - 1
+            dealt = np.where(seats[:, :, None],
+                             self.deck[rows[:, None, None], 2 * slot[:, :, None] + np.arange(2)],
+                             -1)
+            self.hand[rows] = dealt
+            self.deck_pos[rows] = 2 * n_dealt
+
+            # heads up the button posts the small blind
+            heads_up = n_dealt == 2
+            sb = np.where(heads_up, self.button[rows], self._next_seat(rows, self.button[rows], self.playing_hand[rows]))
+            bb = self._next_seat(rows, sb, self.playing_hand[rows])
+            self._bet(rows, sb, self.smallblind[rows])
+            self._bet(rows, bb, self.bigblind[rows])
+            self.tocall[rows] = self.currentbet[rows].max(axis=1)
+            self.lastraise[rows] = self.bigblind[rows]
+            self.current_player[rows] = bb
+
+            done = self._advance(rows)
+            rows = rows[done]
+
+    def _advance(self, rows):
+        """
+        Move `rows` to their next decision after an action (or after the blinds):
+        next player, next round, or settle the cycle. Returns the mask of settled cycles.
+        """
+        playing = self.playing_hand[rows]
+        can_act = playing & ~self.isallin[rows]
+        pending = can_act & (~self.playedthisround[rows] | (self.currentbet[rows] < self.tocall[rows, None]))
+        # nobody left to respond to the only player able to act
+        lone = (can_act.sum(axis=1) <= 1) & ~(can_act & (self.currentbet[rows] < self.tocall[rows, None])).any(axis=1)
+        round_over = ~pending.any(axis=1) | lone
+        fold_win = playing.sum(axis=1) == 1
+        runout = round_over & (can_act.sum(axis=1) <= 1)
+        showdown = ~fold_win & (runout | (round_over & (self.round[rows] == 3)))
+        next_round = round_over & ~showdown & ~fold_win
+        keep = ~round_over & ~fold_win
+
+        if keep.any():
+            r = rows[keep]
+            self.current_player[r] = self._next_seat(r, self.current_player[r], pending[keep])
+        if next_round.any():
+            r = rows[next_round]
+            self.round[r] += 1
+            self._deal_community(r)
+            self.currentbet[r] = 0
+            self.playedthisround[r] = False
+            self.tocall[r] = 0
+            self.lastraise[r] = 0
+            self.current_player[r] = self._next_seat(r, self.button[r], can_act[next_round])
+        if fold_win.any():
+            r = rows[fold_win]
+            winner = playing[fold_win].argmax(axis=1)
+            self.stack[r, winner] += self.totalpot[r]
+            self.side_pots[r, 0] = self.totalpot[r]
+        if showdown.any():
+            r = rows[showdown]
+            while (self.round[r] < 3).any():
+                left = r[self.round[r] < 3]
+                self.round[left] += 1
+                self._deal_community(left)
+            self._showdown(r)
+        done = fold_win | showdown
+        self.totalpot[rows[done]] = 0
+        return done
+
+    def _deal_community(self, rows):
+        """ burn one card and deal the flop (round 1), the turn (round 2) or the river (round 3) """
+        pos = self.deck_pos[rows]
+        flop = self.round[rows] == 1
+        if flop.any():
+            r, p = rows[flop], pos[flop]
+            self.community[r, :3] = self.deck[r[:, None], p[:, None] + 1 + np.arange(3)]
+            self.deck_pos[r] += 4
+        street = ~flop
+        if street.any():
+            r, p = rows[street], pos[street]
+            self.community[r, self.round[r] + 1] = self.deck[r, p + 1]
+            self.deck_pos[r] += 2
+
+    def _showdown(self, rows):
+        """ rank the remaining hands and pay every (side) pot, layer by layer """
+        playing = self.playing_hand[rows]
+        worst = 7463
+        ranks = np.full(playing.shape, worst, dtype=np.int64)
+        i, s = np.nonzero(playing)
+        ranks[i, s] = self._evaluator.evaluate_many(FULL_DECK[self.hand[rows[i], s]], FULL_DECK[self.community[rows[i]]])
+
+        # split remainders go to the first winner after the button
+        order = (self.button[rows, None] + 1 + self._seat_idx) % self.n_seats
+        # pots built layer by layer as `TexasHoldemEnv._layered_pots` does: a layer that only folded players reached
+        # joins the pot below (the next pot when there is none yet), a layer with the same players as the pot
+        # below is merged into it
+        amount = np.zeros(len(rows), dtype=np.int64)
+        eligible = np.zeros(playing.shape, dtype=bool)
+        started = np.zeros(len(rows), dtype=bool)
+        carry = np.zeros(len(rows), dtype=np.int64)
+        n_pots = np.zeros(len(rows), dtype=np.int64)
+        remaining = self.betting[rows].copy()
+        while (remaining > 0).any():
+            layer = np.where(remaining > 0, remaining, np.iinfo(np.int64).max).min(axis=1, keepdims=True)
+            layer = np.minimum(remaining, np.where(layer == np.iinfo(np.int64).max, 0, layer))
+            remaining -= layer
+            pot = layer.sum(axis=1)
+            layer_eligible = playing & (layer > 0)
+            count = layer_eligible.sum(axis=1)
+            new = (count > 0) & (~started | (count != eligible.sum(axis=1)))
+            self._pay_pots(rows, new & started, amount, eligible, ranks, order, n_pots)
+            amount = np.where(new, pot + carry, amount + np.where(started, pot, 0))
+            carry = np.where(new | started, 0, carry + pot)
+            eligible[new] = layer_eligible[new]
+            started |= new
+        self._pay_pots(rows, started, amount, eligible, ranks, order, n_pots)
+        # chips nobody still in the hand can win (no pot at all) go to the best remaining hand
+        lost = ~started & (carry > 0)
+        self._pay_pots(rows, lost, carry, playing, ranks, order, n_pots)
+
+    def _pay_pots(self, rows, mask, amount, eligible, ranks, order, n_pots):
+        """ pay pot `amount[i]` to the best `eligible[i]` hands of the selected rows, split remainders in `order` """
+        if not mask.any():
+            return
+        i = np.flatnonzero(mask)
+        r = rows[i]
+        pot = amount[i]
+        pot_ranks = np.where(eligible[i], ranks[i], np.iinfo(np.int64).max)
+        winners = pot_ranks == pot_ranks.min(axis=1, keepdims=True)
+        n_win = winners.sum(axis=1)
+        self.stack[r] += winners * (pot // n_win)[:, None]
+        n = np.arange(len(i))
+        first = order[i][n, winners[n[:, None], order[i]].argmax(axis=1)]
+        self.stack[r, first] += pot % n_win
+        level = n_pots[i]
+        keep = level < self.n_seats
+        self.side_pots[r[keep], level[keep]] = pot[keep]
+        n_pots[i] += 1
+
+    def _get_obs(self):
+        """ stacked observation, same fields as `STATE` (cards in treys format, -1 when not dealt) """
+        return {
+            'stack': self.stack.copy(),
+            'playing_hand': self.playing_hand.copy(),
+            'playedthisround': self.playedthisround.copy(),
+            'betting': self.betting.copy(),
+            'isallin': self.isallin.copy(),
+            'hand': np.where(self.hand >= 0, FULL_DECK[self.hand], -1),
+            'button': self.button.copy(),
+            'smallblind': self.smallblind,
+            'bigblind': self.bigblind,
+            'totalpot': self.totalpot.copy(),
+            'lastraise': self.lastraise.copy(),
+            'call_price': self.tocall.copy(),
+            'to_call': self.tocall - self.currentbet[self._rows, self.current_player],
+            'current_player': self.current_player.copy(),
+            'round': self.round.copy(),
+            'community_card': np.where(self.community >= 0, FULL_DECK[self.community], -1),
+        }
@@ -0,0 +1,21 @@
+"""
+Build the NumpyEvaluator tables shipped in holdem/data (see holdem.evaluator).
+
+    python scripts/build_evaluator_tables.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from holdem.evaluator import NUMPY_TABLES_PATH, NumpyEvaluator, get_evaluator  # noqa: E402
+
+
+if __name__ == '__main__':
+    t = time.time()
+    tables = NumpyEvaluator._build_tables(get_evaluator())
+    np.save(NUMPY_TABLES_PATH, tables)
+    print('{} rows, built in {:.1f}s'.format(len(tables), time.time() - t))
@@ -0,0 +1,33 @@
+"""
+Build the heads-up preflop equity tables shipped in holdem/data (see holdem.equity).
+
+    python scripts/build_preflop_equity.py --samples 400000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from holdem.equity import compute_preflop_equity, PREFLOP_169_PATH, PREFLOP_1326_PATH  # noqa: E402
+from holdem.evaluator import get_numpy_evaluator  # noqa: E402
+
+
+def parse():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--samples', type=int, default=400000, help='Monte Carlo samples per hand class')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse()
+    t = time.time()
+    table, combos = compute_preflop_equity(get_numpy_evaluator(), args.samples, np.random.default_rng(args.seed))
+    np.save(PREFLOP_169_PATH, table)
+    np.save(PREFLOP_1326_PATH, combos)
+    print('AA {:.4f}, AKs {:.4f}, 72o {:.4f}, built in {:.0f}s'.format(table[12, 12], table[12, 11], table[0, 5],
+                                                                         time.time() - t))
@@ -0,0 +1,79 @@
+import random
+
+import numpy as np
+
+from agent.randomAgent import randomModel
+from holdem import TexasHoldemEnv, action_table
+
+
+def test_action_space_seed_is_per_table():
+    a = TexasHoldemEnv(2, headless=True)
+    b = TexasHoldemEnv(2, headless=True)
+    reference = TexasHoldemEnv(2, headless=True)
+    b.action_space.seed(7)
+    reference.action_space.seed(7)
+    a.action_space.seed(1)
+    a.action_space.sample()
+    assert np.array_equal(b.action_space.sample(), reference.action_space.sample())
+
+
+def test_spaces_are_not_shared():
+    for obs_mode in TexasHoldemEnv.OBS_MODES:
+        a = TexasHoldemEnv(3, headless=True, obs_mode=obs_mode)
+        b = TexasHoldemEnv(3, headless=True, obs_mode=obs_mode)
+        assert a.action_space is not b.action_space
+        assert a.observation_space is not b.observation_space
+        assert a.observation_space == b.observation_space
+        a.observation_space.seed(0)
+        b.observation_space.seed(0)
+        first, second = a.observation_space.sample(), b.observation_space.sample()
+        if obs_mode == 'dict':
+            assert all(np.array_equal(first[name], second[name]) for name in first)
+        elif obs_mode == 'tuple':
+            assert first == second
+        else:
+            assert np.array_equal(first, second)
+
+
+def test_clone_has_its_own_action_space():
+    env = TexasHoldemEnv(2, headless=True)
+    env.add_player(0)
+    env.add_player(1)
+    env.reset()
+    clone = env.clone()
+    assert clone.action_space is not env.action_space
+    clone.action_space.seed(3)
+    env.action_space.seed(3)
+    assert np.array_equal(clone.action_space.sample(), env.action_space.sample())
+
+
+def test_observation_space_contains_observations():
+    for obs_mode in TexasHoldemEnv.OBS_MODES:
+        for n_seats in (2, 4):
+            env = TexasHoldemEnv(n_seats, headless=True, obs_mode=obs_mode)
+            for seat in range(n_seats):
+                env.add_player(seat)
+            env.seed(0)
+            model = randomModel()
+            random.seed(0)
+            for _ in range(20):
+                obs, terminal = env.reset()
+                if env.episode_end:
+                    break
+                assert env.observation_space.contains(obs), (obs_mode, obs)
+                while not terminal:
+                    seat = env._current_player.player_id
+                    valid_actions = env.get_valid_actions(env._current_player)
+                    action = model.takeAction(env._get_current_state(), seat, valid_actions)
+                    actions = [[action_table.CHECK, 0]] * n_seats
+                    actions[seat] = [action.action, action.amount]
+                    obs, _, terminal, _ = env.step(actions)
+                    assert env.observation_space.contains(obs), (obs_mode, obs)
+
+
+def test_state_space_sample():
+    env = TexasHoldemEnv(3, headless=True)
+    env.observation_space.seed(0)
+    sample = env.observation_space.sample()
+    assert env.observation_space.contains(sample)
+    assert not env.observation_space.contains(sample._replace(community_card=[1, 2, 3, 4, 5]))
@@ -0,0 +1,78 @@
+import numpy as np
+
+from holdem import BatchTexasHoldemEnv, TexasHoldemEnv, action_table
+from holdem.deck import FULL_DECK
+from holdem.evaluator import get_numpy_evaluator
+
+
+def random_actions(env, rng):
+    """ a random legal [action, amount] for the current player of every table """
+    info = env.valid_actions()
+    to_call, minraise, maxraise = info['to_call'], info['min_raise'], info['max_raise']
+    actions = np.zeros((env.n_envs, 2), dtype=np.int64)
+    choice = rng.integers(3, size=env.n_envs)
+    can_raise = minraise <= maxraise
+    actions[:, 0] = np.where(to_call > 0, action_table.CALL, action_table.CHECK)
+    fold = (choice == 0) & (to_call > 0)
+    actions[fold, 0] = action_table.FOLD
+    raising = (choice == 2) & can_raise
+    actions[raising, 0] = action_table.RAISE
+    actions[raising, 1] = rng.integers(minraise[raising], maxraise[raising], endpoint=True)
+    return actions
+
+
+def test_chips_are_conserved():
+    for n_seats in (2, 3, 6):
+        env = BatchTexasHoldemEnv(64, n_seats=n_seats, stack=1000)
+        env.seed(n_seats)
+        rng = np.random.default_rng(n_seats)
+        env.reset()
+        for _ in range(300):
+            env.step(random_actions(env, rng))
+            assert ((env.stack + env.betting).sum(axis=1) == 1000 * n_seats).all()
+            assert (env.stack >= 0).all()
+
+
+def test_layered_pots_pay_like_texas_holdem_env():
+    rng = np.random.default_rng(0)
+    n_seats = 6
+    table = TexasHoldemEnv(n_seats, headless=True, evaluator=get_numpy_evaluator())
+    for seat in range(n_seats):
+        table.add_player(seat)
+    table.reset()
+    batch = BatchTexasHoldemEnv(1, n_seats=n_seats)
+    for _ in range(500):
+        cards = rng.permutation(52)
+        hands = cards[:2 * n_seats].reshape(n_seats, 2)
+        community = cards[2 * n_seats:2 * n_seats + 5]
+        if rng.random() < 0.2:
+            # a royal flush on the board: every live hand ties
+            community = np.array([48, 44, 40, 36, 32])
+            hands = rng.permutation(np.setdiff1d(np.arange(52), community))[:2 * n_seats].reshape(n_seats, 2)
+        # few distinct bets, so that layers are shared, odd amounts for split remainders
+        betting = rng.choice([0, 25, 37, 100, 151, 400], size=n_seats)
+        playing = (rng.random(n_seats) < 0.6) & (betting > 0)
+        if playing.sum() < 2:
+            continue
+        button = int(rng.integers(n_seats))
+
+        table._button = button
+        table._round = 3
+        table.community = FULL_DECK[community].tolist()
+        for seat, p in enumerate(table._seats):
+            p.stack = 0
+            p.betting = int(betting[seat])
+            p.playing_hand = bool(playing[seat])
+            p.hand = FULL_DECK[hands[seat]].tolist()
+        table.cycle_checkout([p for p in table._seats if p.playing_hand])
+
+        batch.button[0] = button
+        batch.community[0] = community
+        batch.hand[0] = hands
+        batch.betting[0] = betting
+        batch.playing_hand[0] = playing
+        batch.stack[0] = 0
+        batch._showdown(np.array([0]))
+
+        assert [p.stack for p in table._seats] == batch.stack[0].tolist(), (betting, playing, button)
+        assert batch.stack[0].sum() == betting.sum()
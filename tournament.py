@@ -0,0 +1,42 @@
+import argparse
+import json
+
+from holdem.tournament import run_tournament
+
+
+def parse():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('agents',
+                        nargs='+',
+                        help='agent specs, e.g. agent.randomModel, every pair plays a match')
+    parser.add_argument('--episodes',
+                        type=int,
+                        default=100,
+                        help='number of episodes per match')
+    parser.add_argument('--workers',
+                        type=int,
+                        default=None,
+                        help='number of worker processes, by default the number of cores')
+    parser.add_argument('--seed',
+                        type=int,
+                        default=0,
+                        help='tournament seed, every episode is seeded from it')
+    parser.add_argument('--no_blind_increment',
+                        action='store_true',
+                        help='define whether amount of blinds will increase in a episode')
+    parser.add_argument('--json',
+                        help='save the results in this json file')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arg_list = parse()
+    results = run_tournament(arg_list.agents, arg_list.episodes, workers=arg_list.workers, seed=arg_list.seed,
+                             blind_increment=not arg_list.no_blind_increment)
+    for r in results:
+        print('{} vs {}: {} episodes, chips {:+.1f} [{:+.1f}, {:+.1f}], win rate {:.3f} [{:.3f}, {:.3f}]'.format(
+            r['agents'][0], r['agents'][1], r['episodes'], r['chips_mean'], r['chips_ci95'][0], r['chips_ci95'][1],
+            r['win_rate'], r['win_rate_ci95'][0], r['win_rate_ci95'][1]))
+    if arg_list.json:
+        with open(arg_list.json, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,52 @@
+import argparse
+import time
+
+from holdem.cfr import CFRSolver
+
+
+def parse():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('output',
+                        help='policy file (.npz), play it with agent.cfrModel')
+    parser.add_argument('--iterations',
+                        type=int,
+                        default=10000,
+                        help='number of iterations, one dealt cycle traversed for each player')
+    parser.add_argument('--workers',
+                        type=int,
+                        default=1,
+                        help='number of worker processes')
+    parser.add_argument('--sync_every',
+                        type=int,
+                        default=100,
+                        help='iterations of each worker between two merges of the regrets')
+    parser.add_argument('--stack',
+                        type=int,
+                        default=1000)
+    parser.add_argument('--blind_level',
+                        type=int,
+                        default=0,
+                        help='index of the blinds in TexasHoldemEnv.BLIND_INCREMENTS')
+    parser.add_argument('--buckets',
+                        type=int,
+                        default=8,
+                        help='number of hand equity buckets')
+    parser.add_argument('--max_raises',
+                        type=int,
+                        default=2,
+                        help='raises per betting round')
+    parser.add_argument('--seed',
+                        type=int,
+                        default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arg_list = parse()
+    solver = CFRSolver(stack=arg_list.stack, blind_level=arg_list.blind_level, n_buckets=arg_list.buckets,
+                       max_raises=arg_list.max_raises, seed=arg_list.seed)
+    start = time.perf_counter()
+    solver.train(arg_list.iterations, workers=arg_list.workers, sync_every=arg_list.sync_every)
+    print('{} iterations in {:.1f}s, {} information sets'.format(solver.iterations, time.perf_counter() - start,
+                                                                 len(solver.table)))
+    solver.save(arg_list.output)